@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+# ==================================================
+# Actuator feedback (V1.5)
+# ==================================================
+ACK_TIMEOUT_S = 30.0        # not converged after x s -> resend (wait doubles per resend)
+MAX_RESENDS = 4             # then give up until the next new command (30+60+120+240 s)
+TOLERANCE_W = 25.0          # absolute power tolerance ...
+TOLERANCE_PCT = 5.0         # ... or relative, whichever is larger
+HISTORY_LEN = 100           # rolling window for the histograms
+
+LATENCY_BINS_S = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+ERROR_BINS_W = (10.0, 25.0, 50.0, 100.0, 200.0, 500.0)
+
+
+def _histogram(values: deque[float], bins: tuple[float, ...]) -> list[int]:
+    """Counts per bin; the last entry counts values above the last edge."""
+    counts = [0] * (len(bins) + 1)
+    for v in values:
+        counts[bisect_left(bins, v)] += 1
+    return counts
+
+
+def _quantile(values: deque[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+@dataclass
+class PendingCommand:
+    mode: str
+    watts: float | None          # expected device power (+charge / -discharge), None = not checkable
+    sent_ts: float
+    last_send_ts: float
+    resends: int = 0
+    converged_ts: float | None = None
+    degraded: bool = False       # gave up resending, device does not follow
+
+
+class ActuatorMonitor:
+    """Compares commanded mode/power with what the device reports.
+
+    Measures command-to-effect latency and the steady-state power error
+    into rolling windows and tells the coordinator when a command should
+    be sent again because the device has not converged. Resends back off
+    exponentially; after MAX_RESENDS the actuator is reported degraded and
+    left alone until the next new command.
+    """
+
+    def __init__(self, timeout_s: float = ACK_TIMEOUT_S) -> None:
+        self.timeout_s = float(timeout_s)
+        self.pending: PendingCommand | None = None
+        self.latencies: deque[float] = deque(maxlen=HISTORY_LEN)
+        self.errors: deque[float] = deque(maxlen=HISTORY_LEN)
+        self.resends_total = 0
+        self.timeouts_total = 0
+
+    # --------------------------------------------------
+    def is_current(self, mode: str, watts: float | None) -> bool:
+        """True if exactly this command is already in flight or applied."""
+        p = self.pending
+        return p is not None and p.mode == mode and p.watts == watts
+
+    def command(self, mode: str, watts: float | None, now_ts: float) -> None:
+        """Register a new command (starts a latency measurement)."""
+        if self.is_current(mode, watts):
+            return
+        self.pending = PendingCommand(mode=mode, watts=watts, sent_ts=now_ts, last_send_ts=now_ts)
+
+    def _converged(self, mode: str | None, power_w: float | None) -> bool:
+        p = self.pending
+        if p is None:
+            return False
+        if mode is not None and mode != p.mode:
+            return False
+        if p.watts is None:
+            return mode is not None
+        if power_w is None:
+            return False
+        tol = max(TOLERANCE_W, abs(p.watts) * TOLERANCE_PCT / 100.0)
+        return abs(power_w - p.watts) <= tol
+
+    def observe(self, mode: str | None, power_w: float | None, now_ts: float) -> None:
+        """Feed the device's reported mode/power (called on every state event)."""
+        p = self.pending
+        if p is None:
+            return
+
+        if p.converged_ts is None:
+            if self._converged(mode, power_w):
+                p.converged_ts = now_ts
+                p.degraded = False
+                self.latencies.append(max(now_ts - p.sent_ts, 0.0))
+            return
+
+        # device left the commanded mode (user, app, device reset) -> resend
+        if mode is not None and mode != p.mode:
+            p.converged_ts = None
+            p.sent_ts = now_ts
+            p.last_send_ts = now_ts - self.timeout_s
+            p.resends = 0
+            return
+
+        # steady state: track the remaining power error
+        if p.watts is not None and power_w is not None:
+            self.errors.append(abs(power_w - p.watts))
+
+    def needs_resend(self, now_ts: float) -> bool:
+        """True if the pending command timed out and should be sent again."""
+        p = self.pending
+        if p is None or p.converged_ts is not None or p.degraded:
+            return False
+        if now_ts - p.last_send_ts < self.timeout_s * (2 ** p.resends):
+            return False
+        self.timeouts_total += 1
+        if p.resends >= MAX_RESENDS:
+            p.degraded = True
+            return False
+        p.resends += 1
+        p.last_send_ts = now_ts
+        self.resends_total += 1
+        return True
+
+    # --------------------------------------------------
+    def stats(self) -> dict[str, Any]:
+        p50 = _quantile(self.latencies, 0.5)
+        p95 = _quantile(self.latencies, 0.95)
+        err = (sum(self.errors) / len(self.errors)) if self.errors else None
+        return {
+            "actuator_latency_p50": round(p50, 2) if p50 is not None else None,
+            "actuator_latency_p95": round(p95, 2) if p95 is not None else None,
+            "actuator_error_w": round(err, 1) if err is not None else None,
+            "actuator_resends": self.resends_total,
+            "actuator_converged": self.pending is None or self.pending.converged_ts is not None,
+            "actuator_degraded": self.pending is not None and self.pending.degraded,
+        }
+
+    def histograms(self) -> dict[str, Any]:
+        return {
+            "latency_bins_s": list(LATENCY_BINS_S),
+            "latency_counts": _histogram(self.latencies, LATENCY_BINS_S),
+            "error_bins_w": list(ERROR_BINS_W),
+            "error_counts": _histogram(self.errors, ERROR_BINS_W),
+            "samples": len(self.latencies),
+            "timeouts": self.timeouts_total,
+        }
@@ -4,6 +4,13 @@ from typing import Any
 
 from .constants import MODE_AUTOMATIC, MODE_MANUAL, MODE_SUMMER, MODE_WINTER
 
+try:
+    import numpy as np
+except ImportError:  # optional – only the batch API needs it
+    np = None
+
+HAS_NUMPY = np is not None
+
 
 def calculate_ai_state(
     *,
@@ -145,3 +152,123 @@ def calculate_ai_state(
         "price_now": price_now,
         "expensive_threshold": expensive,
     }
+
+
+# ==================================================
+# Batch variant (backtesting / what-if, V1.5)
+# ==================================================
+def calculate_ai_state_batch(
+    *,
+    soc: Any,
+    soc_min: Any,
+    soc_max: Any,
+    pv: Any,
+    load: Any,
+    price_now: Any,
+    future_prices: Any,
+    expensive_threshold_fixed: Any,
+    mode: Any,
+) -> dict[str, Any]:
+    """calculate_ai_state for many rows at once (requires numpy).
+
+    Every argument is a scalar or one value per row; `future_prices` is a
+    2-D array (rows x slots), shorter horizons padded with NaN at the end.
+    Returns one array per result field (None -> -1 for indices, NaN for
+    prices); the decisions are identical to the scalar function.
+    """
+    if np is None:
+        raise RuntimeError("calculate_ai_state_batch requires numpy")
+
+    future = np.atleast_2d(np.asarray(future_prices, dtype=float))
+    rows = future.shape[0]
+
+    def _col(v: Any) -> Any:
+        return np.broadcast_to(np.asarray(v, dtype=float), (rows,)).copy()
+
+    soc = np.clip(_col(soc), 0.0, 100.0)
+    soc_min = np.clip(_col(soc_min), 0.0, 100.0)
+    soc_max = np.clip(_col(soc_max), 0.0, 100.0)
+    price_now = _col(price_now)
+    fixed = _col(expensive_threshold_fixed)
+    modes = np.broadcast_to(np.asarray(mode, dtype=object), (rows,))
+
+    soc_notfall = np.maximum(soc_min - 4.0, 5.0)
+    surplus = np.maximum(_col(pv) - _col(load), 0.0)
+
+    # price statistics – cumsum adds left to right like sum(), so avg is bit-identical
+    valid = ~np.isnan(future)
+    n = valid.sum(axis=1)
+    has = n > 0
+    minp = np.where(has, np.min(np.where(valid, future, np.inf), axis=1), price_now)
+    maxp = np.where(has, np.max(np.where(valid, future, -np.inf), axis=1), price_now)
+    total = np.cumsum(np.where(valid, future, 0.0), axis=1)[:, -1] if future.shape[1] else np.zeros(rows)
+    avg = np.where(has, total / np.maximum(n, 1), price_now)
+    dynamic = np.where(has, avg + (maxp - minp) * 0.25, fixed)
+    expensive = np.where(has, np.maximum(fixed, dynamic), fixed)
+
+    # first expensive slot
+    hit = valid & (future >= expensive[:, None])
+    has_peak = hit.any(axis=1)
+    peak = np.where(has_peak, hit.argmax(axis=1), -1)
+
+    # cheapest slot before the peak (whole horizon without a peak or a peak at 0)
+    limit = np.where(peak > 0, peak, future.shape[1])
+    window = valid & (np.arange(future.shape[1])[None, :] < limit[:, None])
+    masked = np.where(window, future, np.inf)
+    cheapest_idx = np.where(has, masked.argmin(axis=1) if future.shape[1] else 0, -1)
+    cheapest_price = np.where(has, masked.min(axis=1) if future.shape[1] else np.nan, np.nan)
+    in_cheapest = cheapest_idx == 0
+
+    not_full = soc < soc_max
+    expensive_now = price_now >= expensive
+    status = np.select(
+        [
+            expensive_now & (soc <= soc_min),
+            expensive_now,
+            (soc <= soc_notfall) & not_full,
+            in_cheapest & not_full,
+            (surplus > 80) & not_full,
+        ],
+        [
+            "expensive_now_protect",
+            "expensive_now_discharge",
+            "emergency_charge",
+            "cheapest_now_charge",
+            "pv_surplus_charge",
+        ],
+        "standby",
+    ).astype(object)
+    recommendation = np.select(
+        [
+            expensive_now & (soc <= soc_min),
+            expensive_now,
+            (soc <= soc_notfall) & not_full,
+            in_cheapest & not_full,
+            (surplus > 80) & not_full,
+        ],
+        ["standby", "entladen", "billig_laden", "ki_laden", "laden"],
+        "standby",
+    ).astype(object)
+
+    summer = (modes == MODE_SUMMER) & np.isin(recommendation, ("billig_laden", "ki_laden"))
+    status[summer] = "mode_summer_standby"
+    recommendation[summer] = "standby"
+
+    manual = modes == MODE_MANUAL
+    status[manual] = "mode_manual"
+    recommendation[manual] = "standby"
+
+    return {
+        "ai_status": status,
+        "recommendation": recommendation,
+        "expensive_threshold": expensive,
+        "expensive_threshold_dynamic": dynamic,
+        "min_price_future": minp,
+        "max_price_future": maxp,
+        "avg_price_future": avg,
+        "future_len": n,
+        "peak_start_idx": peak,
+        "cheapest_idx": cheapest_idx,
+        "cheapest_price": cheapest_price,
+        "in_cheapest_slot": in_cheapest & has,
+    }
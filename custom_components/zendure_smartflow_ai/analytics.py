@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any
+
+# ==================================================
+# Per-day / per-month aggregates (V1.5)
+# ==================================================
+DAYS_KEPT = 62
+MONTHS_KEPT = 24
+
+# stored per period as one compact list in this order
+FIELDS = (
+    "charged_kwh",
+    "discharged_kwh",
+    "profit_eur",
+    "pv_kwh",
+    "load_kwh",
+    "import_kwh",
+    "export_kwh",
+)
+
+
+def _add(store: OrderedDict[str, list[float]], key: str, deltas: list[float], keep: int) -> None:
+    row = store.get(key)
+    if row is None:
+        row = [0.0] * len(FIELDS)
+        store[key] = row
+        while len(store) > keep:
+            store.popitem(last=False)
+    for k, v in enumerate(deltas):
+        row[k] += v
+
+
+def summarize(row: list[float] | None, capacity_kwh: float) -> dict[str, Any]:
+    """Field dict plus derived cycles, self-consumption and autarky."""
+    values = dict(zip(FIELDS, row or [0.0] * len(FIELDS)))
+    pv = values["pv_kwh"]
+    load = values["load_kwh"]
+    values["cycles"] = values["discharged_kwh"] / max(capacity_kwh, 0.1)
+    values["self_consumption_pct"] = (
+        max(min((pv - values["export_kwh"]) / pv * 100.0, 100.0), 0.0) if pv > 1e-6 else None
+    )
+    values["autarky_pct"] = (
+        max(min((load - values["import_kwh"]) / load * 100.0, 100.0), 0.0) if load > 1e-6 else None
+    )
+    return {k: round(v, 4) if isinstance(v, float) else v for k, v in values.items()}
+
+
+class PeriodAggregates:
+    """Running totals per local day and month, updated in O(1) per cycle.
+
+    A new key starts a new bucket, so the rollover at local midnight needs
+    no extra bookkeeping; only the last DAYS_KEPT / MONTHS_KEPT are kept.
+    """
+
+    def __init__(self) -> None:
+        self.days: OrderedDict[str, list[float]] = OrderedDict()
+        self.months: OrderedDict[str, list[float]] = OrderedDict()
+
+    def add(self, local_day: date, **deltas: float) -> None:
+        row = [float(deltas.get(name, 0.0)) for name in FIELDS]
+        _add(self.days, local_day.isoformat(), row, DAYS_KEPT)
+        _add(self.months, local_day.strftime("%Y-%m"), row, MONTHS_KEPT)
+
+    def day(self, local_day: date, capacity_kwh: float) -> dict[str, Any]:
+        return summarize(self.days.get(local_day.isoformat()), capacity_kwh)
+
+    def month(self, local_day: date, capacity_kwh: float) -> dict[str, Any]:
+        return summarize(self.months.get(local_day.strftime("%Y-%m")), capacity_kwh)
+
+    # --------------------------------------------------
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "fields": list(FIELDS),
+            "days": {k: [round(v, 4) for v in row] for k, row in self.days.items()},
+            "months": {k: [round(v, 4) for v in row] for k, row in self.months.items()},
+        }
+
+    def restore(self, data: Any) -> None:
+        if not isinstance(data, dict) or list(data.get("fields") or []) != list(FIELDS):
+            return
+        try:
+            for target, key, keep in ((self.days, "days", DAYS_KEPT), (self.months, "months", MONTHS_KEPT)):
+                for period, row in sorted((data.get(key) or {}).items()):
+                    values = [float(v) for v in row][: len(FIELDS)]
+                    target[str(period)] = values + [0.0] * (len(FIELDS) - len(values))
+                while len(target) > keep:
+                    target.popitem(last=False)
+        except (TypeError, ValueError):
+            return
+
+
+# ==================================================
+# Hourly totals for HA long-term statistics (V1.5)
+# ==================================================
+HOUR_S = 3600
+STAT_FIELDS = ("charged_kwh", "discharged_kwh", "profit_eur")
+STAT_PENDING_MAX = 24 * 14  # completed hours queued while the recorder is unavailable
+
+
+class HourlyTotals:
+    """Lifetime totals at the end of every completed hour.
+
+    Each cycle only overwrites the running totals; when the hour changes the
+    last totals of the finished hour are queued as one row
+    [hour_start, *STAT_FIELDS] and imported in batches.
+    """
+
+    def __init__(self) -> None:
+        self.hour: int | None = None
+        self.totals: list[float] = [0.0] * len(STAT_FIELDS)
+        self.pending: list[list[float]] = []
+
+    def update(self, ts: float, totals: tuple[float, ...]) -> None:
+        hour = int(ts // HOUR_S * HOUR_S)
+        if self.hour is not None and hour > self.hour:
+            self.pending.append([self.hour, *self.totals])
+            del self.pending[:-STAT_PENDING_MAX]
+        if self.hour is None or hour >= self.hour:
+            self.hour = hour
+        self.totals = [float(v) for v in totals]
+
+    def take(self) -> list[list[float]]:
+        rows = self.pending
+        self.pending = []
+        return rows
+
+    def requeue(self, rows: list[list[float]]) -> None:
+        self.pending[:0] = rows
+        del self.pending[:-STAT_PENDING_MAX]
+
+    # --------------------------------------------------
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "hour": self.hour,
+            "totals": [round(v, 4) for v in self.totals],
+            "pending": [[int(r[0]), *(round(v, 4) for v in r[1:])] for r in self.pending],
+        }
+
+    def restore(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        try:
+            hour = data.get("hour")
+            self.hour = int(hour) if hour is not None else None
+            totals = [float(v) for v in data.get("totals") or []]
+            if len(totals) == len(STAT_FIELDS):
+                self.totals = totals
+            self.pending = [
+                [int(r[0]), *(float(v) for v in r[1:])]
+                for r in data.get("pending") or []
+                if len(r) == len(STAT_FIELDS) + 1
+            ][-STAT_PENDING_MAX:]
+        except (TypeError, ValueError):
+            return
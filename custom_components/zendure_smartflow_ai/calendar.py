@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    INTEGRATION_NAME,
+    INTEGRATION_MANUFACTURER,
+    INTEGRATION_MODEL,
+    INTEGRATION_VERSION,
+)
+from .planner import PlanWindow
+
+EVENT_SUMMARY = {
+    "charge": "Planned charge",
+    "discharge": "Planned discharge",
+}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    add_entities: AddEntitiesCallback,
+) -> None:
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    add_entities([ZendureSmartFlowPlanCalendar(entry, coordinator)])
+
+
+def _window_to_event(entry_id: str, w: PlanWindow) -> CalendarEvent:
+    start = dt_util.utc_from_timestamp(w.start)
+    end = dt_util.utc_from_timestamp(w.end)
+
+    lines = [f"Target SoC: {w.soc_end:.0f} %", f"Power: {w.watts:.0f} W"]
+    if w.action == "charge":
+        lines.append(
+            "Latest start: " + dt_util.as_local(dt_util.utc_from_timestamp(w.last_start)).strftime("%H:%M")
+        )
+    if w.peak is not None:
+        peak_local = dt_util.as_local(dt_util.utc_from_timestamp(w.peak))
+        peak_line = f"Price peak: {peak_local.strftime('%H:%M')}"
+        if w.peak_price is not None:
+            peak_line += f" ({w.peak_price:.3f} €/kWh)"
+        lines.append(peak_line)
+
+    return CalendarEvent(
+        start=start,
+        end=end,
+        summary=EVENT_SUMMARY.get(w.action, w.action),
+        description="\n".join(lines),
+        uid=f"{entry_id}_{w.action}_{int(w.start)}",
+    )
+
+
+class ZendureSmartFlowPlanCalendar(CalendarEntity):
+    """Planned charge/discharge windows of the cached price plan."""
+
+    _attr_has_entity_name = True
+    _attr_translation_key = "price_plan"
+    _attr_icon = "mdi:calendar-clock"
+
+    def __init__(self, entry: ConfigEntry, coordinator) -> None:
+        self.coordinator = coordinator
+        self._entry = entry
+
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_price_plan"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.entry_id)},
+            "name": INTEGRATION_NAME,
+            "manufacturer": INTEGRATION_MANUFACTURER,
+            "model": INTEGRATION_MODEL,
+            "sw_version": INTEGRATION_VERSION,
+        }
+
+        # events are derived once per plan revision and served from memory
+        self._events: list[CalendarEvent] = []
+        self._revision: int | None = None
+
+    def _plan_events(self) -> list[CalendarEvent]:
+        plan = self.coordinator.plan
+        if plan is None:
+            return []
+        if plan.revision != self._revision:
+            self._events = [_window_to_event(self._entry.entry_id, w) for w in plan.windows]
+            self._revision = plan.revision
+        return self._events
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.last_update_success
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        now = dt_util.utcnow()
+        for ev in self._plan_events():
+            if ev.end > now:
+                return ev
+        return None
+
+    async def async_get_events(
+        self,
+        hass: HomeAssistant,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> list[CalendarEvent]:
+        return [
+            ev
+            for ev in self._plan_events()
+            if ev.end > start_date and ev.start < end_date
+        ]
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self.async_write_ha_state)
+        )
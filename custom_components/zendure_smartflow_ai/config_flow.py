@@ -12,6 +12,7 @@ from .const import (
     CONF_SOC_ENTITY,
     CONF_PV_ENTITY,
     CONF_PRICE_EXPORT_ENTITY,
+    CONF_PV_FORECAST_ENTITY,
     CONF_PRICE_NOW_ENTITY,
     CONF_AC_MODE_ENTITY,
     CONF_INPUT_LIMIT_ENTITY,
@@ -24,7 +25,8 @@ from .const import (
     GRID_MODE_SINGLE,
     GRID_MODE_SPLIT,
     CONF_ZAMANAGER_MODE,
-    CONF_ZAMANAGER_POWER
+    CONF_ZAMANAGER_POWER,
+    CONF_BATTERY_POWER_ENTITY,
 )
 
 
@@ -141,6 +143,9 @@ class ZendureSmartFlowConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(CONF_PRICE_NOW_ENTITY, default=_val(CONF_PRICE_NOW_ENTITY)):
                     selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor")),
 
+                vol.Optional(CONF_PV_FORECAST_ENTITY, default=_val(CONF_PV_FORECAST_ENTITY)):
+                    selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor", multiple=True)),
+
                 vol.Required(CONF_AC_MODE_ENTITY, default=_val(CONF_AC_MODE_ENTITY)):
                     selector.EntitySelector(selector.EntitySelectorConfig(domain="select")),
 
@@ -156,6 +161,9 @@ class ZendureSmartFlowConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_ZAMANAGER_POWER, default=_val(CONF_ZAMANAGER_POWER)):
                     selector.EntitySelector(selector.EntitySelectorConfig(domain="number")),
 
+                vol.Optional(CONF_BATTERY_POWER_ENTITY, default=_val(CONF_BATTERY_POWER_ENTITY)):
+                    selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor")),
+
                 vol.Required(CONF_GRID_MODE, default=_val(CONF_GRID_MODE) or GRID_MODE_SINGLE):
                     selector.SelectSelector(
                         selector.SelectSelectorConfig(
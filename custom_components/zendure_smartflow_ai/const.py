@@ -12,10 +12,15 @@ INTEGRATION_MANUFACTURER = "PalmManiac"
 INTEGRATION_MODEL = "Home Assistant Integration"
 INTEGRATION_VERSION = "1.4.0-Beta3"
 
+# Bus event, fired only when power_state / ai_status / emergency latch /
+# planned action actually change (payload: kind, old, new + context)
+EVENT_TRANSITION = f"{DOMAIN}_transition"
+
 PLATFORMS: list[Platform] = [
     Platform.SENSOR,
     Platform.NUMBER,
     Platform.SELECT,
+    Platform.CALENDAR,
 ]
 
 # ==================================================
@@ -25,9 +30,12 @@ CONF_SOC_ENTITY = "soc_entity"
 CONF_PV_ENTITY = "pv_entity"
 
 # Preis ist optional (Sommer/PV-only Nutzer)
-CONF_PRICE_EXPORT_ENTITY = "price_export_entity"  # Tibber Export (attributes.data)
+CONF_PRICE_EXPORT_ENTITY = "price_export_entity"  # Preisvorschau (Tibber, EPEX Spot, Nord Pool, ENTSO-E, aWATTar)
 CONF_PRICE_NOW_ENTITY = "price_now_entity"        # direkter Preis-Sensor (€/kWh)
 
+# PV-Prognose ist optional (Solcast heute/morgen, Forecast.Solar) – mehrere Entitäten möglich
+CONF_PV_FORECAST_ENTITY = "pv_forecast_entity"
+
 # Zendure Steuer-Entitäten
 CONF_AC_MODE_ENTITY = "ac_mode_entity"            # select input/output
 CONF_INPUT_LIMIT_ENTITY = "input_limit_entity"    # number W
@@ -37,6 +45,9 @@ CONF_OUTPUT_LIMIT_ENTITY = "output_limit_entity"  # number W
 CONF_ZAMANAGER_MODE = "manager_mode_entity"
 CONF_ZAMANAGER_POWER = "manager_power_entity"
 
+# Gemessene Akkuleistung (optional, +Laden / -Entladen) – Rückmeldung der Stellgröße
+CONF_BATTERY_POWER_ENTITY = "battery_power_entity"
+
 # Grid Setup (empfohlen, weil wir daraus den Hausverbrauch intern berechnen)
 CONF_GRID_MODE = "grid_mode"
 CONF_GRID_POWER_ENTITY = "grid_power_entity"      # +import / -export
@@ -63,6 +74,20 @@ MANUAL_DISCHARGE = "discharge"
 
 MANUAL_ACTIONS = [MANUAL_STANDBY, MANUAL_CHARGE, MANUAL_DISCHARGE]
 
+# Regelung: 10-s-Zyklus (tick) oder schneller PI-Regler auf Netzzähler-Events
+CONTROL_MODE_TICK = "tick"
+CONTROL_MODE_PI = "pi"
+
+CONTROL_MODES = [CONTROL_MODE_TICK, CONTROL_MODE_PI]
+
+# Netzgrenze: harte Einspeise- und/oder Bezugsgrenze (auf jedem Netzzähler-Event geprüft)
+GRID_CAP_OFF = "off"
+GRID_CAP_EXPORT = "export"
+GRID_CAP_IMPORT = "import"
+GRID_CAP_BOTH = "both"
+
+GRID_CAP_MODES = [GRID_CAP_OFF, GRID_CAP_EXPORT, GRID_CAP_IMPORT, GRID_CAP_BOTH]
+
 # ==================================================
 # Settings (Number entities) – entity keys
 # ==================================================
@@ -73,12 +98,32 @@ SETTING_MAX_DISCHARGE = "max_discharge"
 
 SETTING_PRICE_THRESHOLD = "price_threshold"
 SETTING_VERY_EXPENSIVE_THRESHOLD = "very_expensive_threshold"
+# adaptive thresholds: percentile of the last weeks' prices (0 = fixed € value)
+SETTING_PRICE_THRESHOLD_PCT = "price_threshold_pct"
+SETTING_VERY_EXPENSIVE_PCT = "very_expensive_pct"
 
 SETTING_EMERGENCY_SOC = "emergency_soc"           # Notladung wenn SoC <= x
 SETTING_EMERGENCY_CHARGE = "emergency_charge"     # Notladeleistung (W)
 
 SETTING_PROFIT_MARGIN_PCT = "profit_margin_pct"   # Arbitrage/Planung
 
+SETTING_PLANNING_TIME_BUDGET = "planning_time_budget"  # Watchdog Preisplanung (s)
+SETTING_BATTERY_CAPACITY_KWH = "battery_capacity_kwh"  # nutzbare Akkukapazität
+SETTING_BATTERY_EFFICIENCY = "battery_efficiency"      # Wirkungsgrad je Richtung (%)
+
+SETTING_GRID_SETPOINT = "grid_setpoint"           # PI-Regler Ziel-Netzleistung (W, +Bezug / -Einspeisung)
+
+SETTING_GRID_EXPORT_LIMIT = "grid_export_limit"   # max. Einspeisung (W)
+SETTING_GRID_IMPORT_LIMIT = "grid_import_limit"   # max. Netzbezug (W)
+
+SETTING_WEAR_COST_PER_CYCLE = "wear_cost_per_cycle"  # Akkuverschleiß je Vollzyklus (€)
+
+SETTING_FEED_IN_PRICE = "feed_in_price"           # Einspeisevergütung (€/kWh) – Wert von PV-Strom im Akku
+
+SETTING_PV_FORECAST_SHARE_PCT = "pv_forecast_share_pct"  # Anteil der PV-Prognose, der im Akku ankommt (%)
+
+SETTING_HISTORY_LOG_MB = "history_log_mb"         # Verlaufsprotokoll Größenlimit (MB, 0 = aus)
+
 # ==================================================
 # Defaults
 # ==================================================
@@ -92,12 +137,31 @@ DEFAULT_MAX_DISCHARGE = 700.0
 
 DEFAULT_PRICE_THRESHOLD = 0.35
 DEFAULT_VERY_EXPENSIVE_THRESHOLD = 0.49
+DEFAULT_PRICE_THRESHOLD_PCT = 0.0
+DEFAULT_VERY_EXPENSIVE_PCT = 0.0
 
 DEFAULT_EMERGENCY_SOC = 8.0
 DEFAULT_EMERGENCY_CHARGE = 1200.0
 
 DEFAULT_PROFIT_MARGIN_PCT = 27.0
 
+DEFAULT_PLANNING_TIME_BUDGET = 2.0  # seconds
+DEFAULT_BATTERY_CAPACITY_KWH = 1.92  # SolarFlow AB2000
+DEFAULT_BATTERY_EFFICIENCY = 95.0
+
+DEFAULT_GRID_SETPOINT = 0.0
+
+DEFAULT_GRID_EXPORT_LIMIT = 800.0   # Balkonkraftwerk
+DEFAULT_GRID_IMPORT_LIMIT = 3000.0
+
+DEFAULT_WEAR_COST_PER_CYCLE = 0.0  # 0 = wear not priced in
+
+DEFAULT_FEED_IN_PRICE = 0.08  # EEG Teileinspeisung, 0 = no feed-in tariff
+
+DEFAULT_PV_FORECAST_SHARE_PCT = 50.0  # rest covers the house load
+
+DEFAULT_HISTORY_LOG_MB = 0.0  # opt-in
+
 # ==================================================
 # Status / Enum values (internal)
 # ==================================================
@@ -105,6 +169,8 @@ STATUS_INIT = "init"
 STATUS_OK = "ok"
 STATUS_SENSOR_INVALID = "sensor_invalid"
 STATUS_PRICE_INVALID = "price_invalid"
+STATUS_DEGRADED = "degraded"  # planner failed/timed out -> last good plan
+STATUS_SENSOR_STALE = "sensor_stale"  # inputs stale too long -> safe hold (ZA manager off)
 
 AI_STATUS_STANDBY = "standby"
 AI_STATUS_CHARGE_SURPLUS = "charge_surplus"
@@ -124,6 +190,8 @@ STATUS_ENUMS = [
     STATUS_OK,
     STATUS_SENSOR_INVALID,
     STATUS_PRICE_INVALID,
+    STATUS_DEGRADED,
+    STATUS_SENSOR_STALE,
 ]
 
 AI_STATUS_ENUMS = [
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Any
+
+# ==================================================
+# Fast grid control (V1.5)
+# ==================================================
+# Sign convention: output u is the battery power in W,
+#   u > 0 -> discharge (output), u < 0 -> charge (input)
+# Grid power is +import / -export, so more import needs a larger u.
+
+PI_KP = 0.5             # W per W error
+PI_KI = 0.2             # W per W error and second
+PI_MAX_DT_S = 5.0       # longer gaps between meter events are not integrated further
+PI_MIN_STEP_W = 10.0    # smaller changes are not sent to the device
+PI_MIN_INTERVAL_S = 1.0  # at most one command per second
+
+
+class PIController:
+    """Velocity-form PI controller with output clamping as anti-windup.
+
+    The integrator state *is* the clamped output, so it can never wind up
+    beyond [lower, upper] while the battery is saturated.
+    """
+
+    def __init__(self, kp: float = PI_KP, ki: float = PI_KI) -> None:
+        self.kp = float(kp)
+        self.ki = float(ki)
+        self.output = 0.0
+        self._last_error: float | None = None
+        self._last_ts: float | None = None
+
+    def reset(self, output: float = 0.0) -> None:
+        """Bumpless start from the current setpoint."""
+        self.output = float(output)
+        self._last_error = None
+        self._last_ts = None
+
+    def update(self, error: float, now_ts: float, lower: float, upper: float) -> float:
+        """Advance the controller by one measurement and return the new output."""
+        error = float(error)
+        if self._last_ts is None or self._last_error is None:
+            dt = 0.0
+            d_error = 0.0
+        else:
+            dt = min(max(now_ts - self._last_ts, 0.0), PI_MAX_DT_S)
+            d_error = error - self._last_error
+
+        u = self.output + self.kp * d_error + self.ki * error * dt
+        self.output = min(max(u, float(lower)), float(upper))
+
+        self._last_error = error
+        self._last_ts = now_ts
+        return self.output
+
+
+# ==================================================
+# Self-tuning ramps / hysteresis (V1.5)
+# ==================================================
+# Base values = the former hard-coded constants (used until enough data exists)
+RAMP_STEP_UP_W = 120.0
+RAMP_STEP_DOWN_W = 40.0
+RAMP_MANUAL_STEP_W = 250.0
+PV_STOP_N = 3
+PV_CLEAR_N = 6
+
+TUNING_WINDOW = 60          # samples (10 min at 10 s)
+TUNING_MIN_SAMPLES = 30
+TUNING_ALPHA = 0.05         # smoothing of the learned parameters per cycle
+
+# safe bounds
+STEP_UP_BOUNDS = (60.0, 400.0)
+STEP_DOWN_BOUNDS = (20.0, 150.0)
+MANUAL_STEP_BOUNDS = (100.0, 600.0)
+PV_STOP_N_BOUNDS = (2, 6)
+PV_CLEAR_N_BOUNDS = (4, 12)
+DEVICE_FACTOR_BOUNDS = (0.5, 2.0)
+
+# oscillation guard on the grid power (+import / -export)
+OSC_DEADBAND_W = 50.0       # smaller grid errors are not a swing
+OSC_FLIP_RATIO = 0.25       # sign flips per sample above which the loop is oscillating
+OSC_BACKOFF = 0.8           # step factor multiplied by this per oscillating cycle
+OSC_BACKOFF_MIN = 0.4
+
+
+def _clamp(v: float, bounds: tuple[float, float]) -> float:
+    return min(max(v, bounds[0]), bounds[1])
+
+
+def _diff_sigma(values: list[float]) -> float:
+    """Standard deviation of consecutive differences (noise, not level)."""
+    if len(values) < 3:
+        return 0.0
+    d = [values[k + 1] - values[k] for k in range(len(values) - 1)]
+    mean = sum(d) / len(d)
+    return (sum((x - mean) ** 2 for x in d) / len(d)) ** 0.5
+
+
+class RampTuner:
+    """Adapts ramp rates and hysteresis counters to the household.
+
+    - device response: the measured actuator latency gives the time
+      constant (first order: settles in ~3 tau). A device that settles
+      within one cycle can take larger steps, a slow one needs smaller
+      steps to avoid commanding on top of an unsettled output.
+      Only with a measured battery power sensor: without one the monitor
+      compares against the integration's own number entity, whose "latency"
+      is just the state echo, and the base steps are kept.
+    - load/surplus volatility: noisy PV surplus needs more consecutive
+      cycles before the state machine flips.
+    - oscillation: frequent sign flips of the grid error back all steps off
+      (down to OSC_BACKOFF_MIN); the factor recovers slowly once calm.
+    All learned values are smoothed and clamped to safe bounds.
+    """
+
+    def __init__(self, cycle_s: float, device_measured: bool = True) -> None:
+        self.cycle_s = float(cycle_s)
+        self.device_measured = bool(device_measured)
+        self._load: deque[float] = deque(maxlen=TUNING_WINDOW)
+        self._surplus: deque[float] = deque(maxlen=TUNING_WINDOW)
+        self._grid: deque[float] = deque(maxlen=TUNING_WINDOW)
+
+        self.tau_s: float | None = None
+        self.load_sigma: float | None = None
+        self.surplus_sigma: float | None = None
+        self.step_up = RAMP_STEP_UP_W
+        self.step_down = RAMP_STEP_DOWN_W
+        self.manual_step = RAMP_MANUAL_STEP_W
+        self._pv_stop_n = float(PV_STOP_N)
+        self._pv_clear_n = float(PV_CLEAR_N)
+        self.flip_ratio: float | None = None
+        self.backoff = 1.0
+
+    @property
+    def pv_stop_n(self) -> int:
+        return int(round(self._pv_stop_n))
+
+    @property
+    def pv_clear_n(self) -> int:
+        return int(round(self._pv_clear_n))
+
+    def add_sample(self, house_load_w: float, surplus_w: float, grid_w: float | None = None) -> None:
+        self._load.append(float(house_load_w))
+        self._surplus.append(float(surplus_w))
+        if grid_w is not None:
+            self._grid.append(float(grid_w))
+
+    def _flip_ratio(self) -> float | None:
+        """Sign changes of the grid error outside the deadband, per sample."""
+        if len(self._grid) < TUNING_MIN_SAMPLES:
+            return None
+        flips = 0
+        last = 0
+        for e in self._grid:
+            if abs(e) < OSC_DEADBAND_W:
+                continue
+            sign = 1 if e > 0 else -1
+            if last and sign != last:
+                flips += 1
+            last = sign
+        return flips / len(self._grid)
+
+    def update(self, latency_s: float | None) -> None:
+        """Move the parameters one smoothing step towards their targets."""
+        if self.device_measured and latency_s is not None and latency_s > 0:
+            tau = latency_s / 3.0
+            self.tau_s = tau if self.tau_s is None else self.tau_s + TUNING_ALPHA * (tau - self.tau_s)
+
+        self.flip_ratio = self._flip_ratio()
+        if self.flip_ratio is not None and self.flip_ratio > OSC_FLIP_RATIO:
+            self.backoff = max(self.backoff * OSC_BACKOFF, OSC_BACKOFF_MIN)
+        else:
+            self.backoff += TUNING_ALPHA * (1.0 - self.backoff)
+
+        if len(self._load) < TUNING_MIN_SAMPLES:
+            return
+
+        self.load_sigma = _diff_sigma(list(self._load))
+        self.surplus_sigma = _diff_sigma(list(self._surplus))
+
+        # device factor: cycles per settling time (1.0 = settles in one cycle)
+        f_dev = 1.0
+        if self.device_measured and self.tau_s is not None:
+            f_dev = _clamp(self.cycle_s / max(3.0 * self.tau_s, 0.1), DEVICE_FACTOR_BOUNDS)
+
+        # volatile load: do not chase noise downwards faster than it moves
+        noise = self.load_sigma or 0.0
+        b = self.backoff
+        up = _clamp(RAMP_STEP_UP_W * f_dev * b, STEP_UP_BOUNDS)
+        down = _clamp(max(RAMP_STEP_DOWN_W * f_dev, 0.5 * noise) * b, STEP_DOWN_BOUNDS)
+        manual = _clamp(RAMP_MANUAL_STEP_W * f_dev * b, MANUAL_STEP_BOUNDS)
+
+        # hysteresis: surplus noise relative to the 80 W stop threshold
+        r = (self.surplus_sigma or 0.0) / 80.0
+        stop_n = _clamp(2.0 + 2.0 * r, PV_STOP_N_BOUNDS)
+        clear_n = _clamp(2.0 * stop_n, PV_CLEAR_N_BOUNDS)
+
+        a = TUNING_ALPHA
+        self.step_up += a * (up - self.step_up)
+        self.step_down += a * (down - self.step_down)
+        self.manual_step += a * (manual - self.manual_step)
+        self._pv_stop_n += a * (stop_n - self._pv_stop_n)
+        self._pv_clear_n += a * (clear_n - self._pv_clear_n)
+
+    # --------------------------------------------------
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "tau_s": round(self.tau_s, 2) if self.tau_s is not None else None,
+            "load_sigma": round(self.load_sigma, 1) if self.load_sigma is not None else None,
+            "surplus_sigma": round(self.surplus_sigma, 1) if self.surplus_sigma is not None else None,
+            "step_up": round(self.step_up, 1),
+            "step_down": round(self.step_down, 1),
+            "manual_step": round(self.manual_step, 1),
+            "pv_stop_n": round(self._pv_stop_n, 2),
+            "pv_clear_n": round(self._pv_clear_n, 2),
+            "flip_ratio": round(self.flip_ratio, 3) if self.flip_ratio is not None else None,
+            "backoff": round(self.backoff, 3),
+        }
+
+    def restore(self, data: Any) -> None:
+        """Restore learned parameters (clamped, so bad stored values cannot escape the bounds)."""
+        if not isinstance(data, dict):
+            return
+        try:
+            if self.device_measured and data.get("tau_s") is not None:
+                self.tau_s = max(float(data["tau_s"]), 0.0)
+            self.backoff = _clamp(float(data.get("backoff", self.backoff)), (OSC_BACKOFF_MIN, 1.0))
+            self.step_up = _clamp(float(data.get("step_up", self.step_up)), STEP_UP_BOUNDS)
+            self.step_down = _clamp(float(data.get("step_down", self.step_down)), STEP_DOWN_BOUNDS)
+            self.manual_step = _clamp(float(data.get("manual_step", self.manual_step)), MANUAL_STEP_BOUNDS)
+            self._pv_stop_n = _clamp(float(data.get("pv_stop_n", self._pv_stop_n)), PV_STOP_N_BOUNDS)
+            self._pv_clear_n = _clamp(float(data.get("pv_clear_n", self._pv_clear_n)), PV_CLEAR_N_BOUNDS)
+        except (TypeError, ValueError):
+            return
+
+
+# ==================================================
+# Feed-forward nowcast (V1.5)
+# ==================================================
+NOWCAST_LEN = 64            # samples kept per signal
+NOWCAST_WINDOW_S = 90.0     # only samples younger than this are fitted
+NOWCAST_WEIGHT_TAU_S = 30.0  # exponential weighting of older samples
+NOWCAST_MIN_SAMPLES = 4
+NOWCAST_MIN_SPAN_S = 20.0
+NOWCAST_MAX_FF_W = 400.0    # feed-forward is a correction, never the whole setpoint
+NOWCAST_MAX_LEAD_S = 10.0   # look ahead at most this far (one meter update, capped)
+
+
+class Nowcaster:
+    """Short-horizon trend of a power signal.
+
+    Exponentially weighted least-squares line over a ring buffer of
+    (timestamp, value) samples; recent samples dominate, so the slope
+    follows a passing cloud within a few meter updates.
+    """
+
+    def __init__(self) -> None:
+        self._samples: deque[tuple[float, float]] = deque(maxlen=NOWCAST_LEN)
+
+    def add(self, ts: float, value: float) -> None:
+        if self._samples and ts <= self._samples[-1][0]:
+            # same instant (tick + event) -> keep the newest value only
+            self._samples[-1] = (self._samples[-1][0], float(value))
+            return
+        self._samples.append((float(ts), float(value)))
+
+    def slope(self, now_ts: float) -> float | None:
+        """Trend in W/s, None if there is not enough recent data."""
+        pts = [(t, v) for t, v in self._samples if now_ts - t <= NOWCAST_WINDOW_S]
+        if len(pts) < NOWCAST_MIN_SAMPLES or pts[-1][0] - pts[0][0] < NOWCAST_MIN_SPAN_S:
+            return None
+
+        sw = swt = swv = swtt = swtv = 0.0
+        for t, v in pts:
+            x = t - now_ts
+            w = math.exp(x / NOWCAST_WEIGHT_TAU_S)
+            sw += w
+            swt += w * x
+            swv += w * v
+            swtt += w * x * x
+            swtv += w * x * v
+
+        denom = sw * swtt - swt * swt
+        if denom <= 1e-9:
+            return None
+        return (sw * swtv - swt * swv) / denom
+
+    def lead_s(self, now_ts: float) -> float:
+        """One update interval of this signal (median spacing), capped at NOWCAST_MAX_LEAD_S."""
+        ts = [t for t, _v in self._samples if now_ts - t <= NOWCAST_WINDOW_S]
+        if len(ts) < 2:
+            return NOWCAST_MAX_LEAD_S
+        gaps = sorted(ts[k + 1] - ts[k] for k in range(len(ts) - 1))
+        return min(gaps[len(gaps) // 2], NOWCAST_MAX_LEAD_S)
+
+
+def feed_forward(slope_w_s: float | None, lead_s: float) -> float:
+    """Correction a few seconds ahead of the last measurement: slope * lead, clamped."""
+    if slope_w_s is None:
+        return 0.0
+    return min(max(slope_w_s * lead_s, -NOWCAST_MAX_FF_W), NOWCAST_MAX_FF_W)
+
+
+# ==================================================
+# Grid import/export cap (V1.5)
+# ==================================================
+GRID_CAP_MARGIN_W = 50.0     # regulate this far below the hard limit
+
+
+class GridCap:
+    """Hard grid limits as bounds on the battery power (PI sign convention).
+
+    With base = grid power the house would draw without the battery
+    (+import), the grid sees base - u. An export limit E therefore means
+    u <= base + E, an import limit I means u >= base - I.
+    Violations of the measured grid power are counted and timed.
+    """
+
+    def __init__(self) -> None:
+        self.violations = 0
+        self.violation_s = 0.0          # total time above a limit
+        self.last_violation_s = 0.0
+        self._since: float | None = None
+        self._last_ts: float | None = None
+
+    @staticmethod
+    def bounds(
+        base_w: float,
+        export_limit: float | None,
+        import_limit: float | None,
+    ) -> tuple[float, float]:
+        lo = float("-inf")
+        hi = float("inf")
+        if export_limit is not None:
+            hi = base_w + max(export_limit - GRID_CAP_MARGIN_W, 0.0)
+        if import_limit is not None:
+            lo = base_w - max(import_limit - GRID_CAP_MARGIN_W, 0.0)
+        return lo, hi
+
+    def observe(
+        self,
+        grid_w: float,
+        export_limit: float | None,
+        import_limit: float | None,
+        now_ts: float,
+    ) -> bool:
+        """Track violations of the measured grid power (+import / -export)."""
+        violated = (
+            (export_limit is not None and -grid_w > export_limit)
+            or (import_limit is not None and grid_w > import_limit)
+        )
+        if self._since is not None and self._last_ts is not None:
+            self.violation_s += max(now_ts - self._last_ts, 0.0)
+            self.last_violation_s = max(now_ts - self._since, 0.0)
+
+        if violated and self._since is None:
+            self.violations += 1
+            self._since = now_ts
+            self.last_violation_s = 0.0
+        elif not violated:
+            self._since = None
+
+        self._last_ts = now_ts
+        return violated
+
+    @property
+    def active(self) -> bool:
+        return self._since is not None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "violations": self.violations,
+            "violation_s": round(self.violation_s, 1),
+            "last_violation_s": round(self.last_violation_s, 1),
+        }
+
+    def restore(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        try:
+            self.violations = max(int(data.get("violations", 0)), 0)
+            self.violation_s = max(float(data.get("violation_s", 0.0)), 0.0)
+            self.last_violation_s = max(float(data.get("last_violation_s", 0.0)), 0.0)
+        except (TypeError, ValueError):
+            return
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections import deque
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import timedelta
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
@@ -14,11 +19,13 @@ from homeassistant.util import dt as dt_util
 from .const import (
     DOMAIN,
     UPDATE_INTERVAL,
+    EVENT_TRANSITION,
     # config keys
     CONF_SOC_ENTITY,
     CONF_PV_ENTITY,
     CONF_PRICE_EXPORT_ENTITY,
     CONF_PRICE_NOW_ENTITY,
+    CONF_PV_FORECAST_ENTITY,
     CONF_AC_MODE_ENTITY,
     CONF_INPUT_LIMIT_ENTITY,
     CONF_OUTPUT_LIMIT_ENTITY,
@@ -32,6 +39,7 @@ from .const import (
     # MH adaption
     CONF_ZAMANAGER_MODE,
     CONF_ZAMANAGER_POWER,
+    CONF_BATTERY_POWER_ENTITY,
     # settings keys (entry.options)
     SETTING_SOC_MIN,
     SETTING_SOC_MAX,
@@ -42,6 +50,18 @@ from .const import (
     SETTING_EMERGENCY_SOC,
     SETTING_EMERGENCY_CHARGE,
     SETTING_PROFIT_MARGIN_PCT,
+    SETTING_PLANNING_TIME_BUDGET,
+    SETTING_BATTERY_CAPACITY_KWH,
+    SETTING_BATTERY_EFFICIENCY,
+    SETTING_GRID_SETPOINT,
+    SETTING_GRID_EXPORT_LIMIT,
+    SETTING_GRID_IMPORT_LIMIT,
+    SETTING_HISTORY_LOG_MB,
+    SETTING_PRICE_THRESHOLD_PCT,
+    SETTING_VERY_EXPENSIVE_PCT,
+    SETTING_WEAR_COST_PER_CYCLE,
+    SETTING_FEED_IN_PRICE,
+    SETTING_PV_FORECAST_SHARE_PCT,
     # defaults
     DEFAULT_SOC_MIN,
     DEFAULT_SOC_MAX,
@@ -52,6 +72,18 @@ from .const import (
     DEFAULT_EMERGENCY_SOC,
     DEFAULT_EMERGENCY_CHARGE,
     DEFAULT_PROFIT_MARGIN_PCT,
+    DEFAULT_PLANNING_TIME_BUDGET,
+    DEFAULT_BATTERY_CAPACITY_KWH,
+    DEFAULT_BATTERY_EFFICIENCY,
+    DEFAULT_GRID_SETPOINT,
+    DEFAULT_GRID_EXPORT_LIMIT,
+    DEFAULT_GRID_IMPORT_LIMIT,
+    DEFAULT_HISTORY_LOG_MB,
+    DEFAULT_PRICE_THRESHOLD_PCT,
+    DEFAULT_VERY_EXPENSIVE_PCT,
+    DEFAULT_WEAR_COST_PER_CYCLE,
+    DEFAULT_FEED_IN_PRICE,
+    DEFAULT_PV_FORECAST_SHARE_PCT,
     # modes
     AI_MODE_AUTOMATIC,
     AI_MODE_SUMMER,
@@ -60,11 +92,19 @@ from .const import (
     MANUAL_STANDBY,
     MANUAL_CHARGE,
     MANUAL_DISCHARGE,
+    CONTROL_MODE_TICK,
+    CONTROL_MODE_PI,
+    GRID_CAP_OFF,
+    GRID_CAP_EXPORT,
+    GRID_CAP_IMPORT,
+    GRID_CAP_BOTH,
     # statuses
     STATUS_INIT,
     STATUS_OK,
     STATUS_SENSOR_INVALID,
     STATUS_PRICE_INVALID,
+    STATUS_DEGRADED,
+    STATUS_SENSOR_STALE,
     AI_STATUS_STANDBY,
     AI_STATUS_CHARGE_SURPLUS,
     AI_STATUS_COVER_DEFICIT,
@@ -82,11 +122,51 @@ from .const import (
     ZENDURE_MANAGER_OFF,
     ZENDURE_MANAGER_CHARGE
 )
+from .actuator import ActuatorMonitor
+from .ai_logic import HAS_NUMPY, calculate_ai_state, calculate_ai_state_batch
+from .control import (
+    PI_MIN_INTERVAL_S,
+    PI_MIN_STEP_W,
+    GridCap,
+    Nowcaster,
+    PIController,
+    RampTuner,
+    feed_forward,
+)
+from .analytics import HourlyTotals, PeriodAggregates
+from .energy import EnergyMeter
+from .historylog import HISTORY_FLUSH_S, HistoryLog
+from .inventory import SOURCE_GRID, SOURCE_PV, EnergyInventory
+from .longterm import async_import_hourly
+from .estimator import SOC_RESYNC_PCT, SocEstimator, crossed
+from .planner import PlanSettings, PricePlan, build_plan, empty_result
+from .prices import PriceSeries, parse_price_attributes
+from .pvforecast import PvForecast, parse_pv_forecast
+from .wear import RainflowCounter
+from .quantiles import PriceQuantiles
+from .sampling import DROP_LIMITS, HOLD_LIMITS, InputSnapshot, Reading, SampleBuffer
 
 _LOGGER = logging.getLogger(__name__)
 
 STORE_VERSION = 1
 
+# recent decisions kept in memory for on-demand charting (1 h at 10 s);
+# historylog.HISTORY_COLUMNS stores the same tuple, keep both in order
+TRACE_LEN = 360
+TRACE_FIELDS = (
+    "ts",
+    "soc",
+    "pv_w",
+    "house_load",
+    "deficit",
+    "surplus",
+    "price_now",
+    "set_input_w",
+    "set_output_w",
+    "decision_reason",
+    "ai_status",
+)
+
 
 def _to_float(v: Any, default: float | None = None) -> float | None:
     try:
@@ -102,12 +182,22 @@ def _to_float(v: Any, default: float | None = None) -> float | None:
         return default
 
 
+def _entity_ids(value: Any) -> tuple[str, ...]:
+    """Entity selector value (single id or list) -> tuple of ids."""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(str(v) for v in value if v)
+
+
 @dataclass
 class SelectedEntities:
     soc: str
     pv: str
     price_export: str | None
     price_now: str | None
+    pv_forecast: tuple[str, ...]
     ac_mode: str
     za_mode: str
     za_power: str
@@ -119,6 +209,8 @@ class SelectedEntities:
     grid_import: str | None
     grid_export: str | None
 
+    battery_power: str | None
+
 
 class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -133,6 +225,7 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             pv=str(entry.data[CONF_PV_ENTITY]),
             price_export=entry.data.get(CONF_PRICE_EXPORT_ENTITY),
             price_now=entry.data.get(CONF_PRICE_NOW_ENTITY),
+            pv_forecast=_entity_ids(entry.data.get(CONF_PV_FORECAST_ENTITY)),
             ac_mode=str(entry.data[CONF_AC_MODE_ENTITY]),
             za_mode=str(entry.data[CONF_ZAMANAGER_MODE]),
             za_power=str(entry.data[CONF_ZAMANAGER_POWER]),
@@ -142,11 +235,14 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             grid_power=entry.data.get(CONF_GRID_POWER_ENTITY),
             grid_import=entry.data.get(CONF_GRID_IMPORT_ENTITY),
             grid_export=entry.data.get(CONF_GRID_EXPORT_ENTITY),
+            battery_power=entry.data.get(CONF_BATTERY_POWER_ENTITY),
         )
 
         self.runtime_mode: dict[str, Any] = {
             "ai_mode": AI_MODE_AUTOMATIC,
             "manual_action": MANUAL_STANDBY,
+            "control_mode": CONTROL_MODE_TICK,
+            "grid_cap_mode": GRID_CAP_OFF,
         }
 
         self._store = Store(hass, STORE_VERSION, f"{DOMAIN}.{entry.entry_id}")
@@ -166,18 +262,18 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             "planning_next_peak": None,
             "planning_reason": None,
             # analytics
-            "trade_avg_charge_price": None,
-            "trade_charged_kwh": 0.0,
             "prev_soc": None,
             # last applied setpoints (for change detection / avoiding service spam)
             "last_set_mode": None,
             "last_set_input_w": None,
             "last_set_output_w": None,
             "avg_charge_price": None,
+            "charge_lot": None,  # [source, €/kWh] decided for the running interval
             "charged_kwh": 0.0,
             "discharged_kwh": 0.0,
             "discharge_target_w": 0.0,
             "profit_eur": 0.0,
+            "wear_eur": 0.0,
             "last_ts": None,
             "power_state": "idle",  # idle | discharging | charging
             # --- V1.3.x transparency ---
@@ -194,6 +290,91 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             "next_planned_action_time": None,  # ISO timestamp
         }
 
+        # --- cached full-horizon plan + watchdog (runtime only) ---
+        # rebuilt once per price/settings change; the last good plan keeps
+        # running if a rebuild times out or raises (state is marked degraded)
+        self._plan: PricePlan | None = None
+        self._plan_revision: int = 0
+        self._plan_signature: Any = None
+        self._plan_failed_signature: Any = None
+        self._planning_degraded: bool = False
+        self._planning_error: str | None = None
+        self._planning_duration_ms: float | None = None
+        self._plan_listeners: list[Callable[[], None]] = []
+
+        # price forecast in the common columnar format, parsed once per export update
+        self._price_series = PriceSeries()
+        self._price_series_updated: Any = None
+
+        # PV forecast in the same columnar form, parsed once per forecast update
+        self._pv_forecast = PvForecast()
+        self._pv_forecast_updated: Any = None
+
+        # last values compared for EVENT_TRANSITION (None until the first cycle)
+        self._transition_state: dict[str, Any] | None = None
+
+        # --- fast PI grid control (runtime only) ---
+        # bounds for the battery power (u > 0 discharge, u < 0 charge) as decided by
+        # the last cycle; None -> PI inactive, the cycle's own setpoints apply
+        self._pi = PIController()
+        self._pi_bounds: tuple[float, float] | None = None
+        self._pi_last_w: int | None = None
+        self._pi_last_cmd_ts: float = 0.0
+
+        # commanded vs. reported device state (latency, steady-state error, resends)
+        self.actuator = ActuatorMonitor()
+
+        # learned ramp rates / hysteresis (persisted in _persist["tuning"]); the
+        # device response is only learned from a measured battery power sensor
+        self.tuner = RampTuner(UPDATE_INTERVAL, device_measured=bool(self.entities.battery_power))
+
+        # short-term trend of net export / PV (fed by meter events and the cycle)
+        self._nowcast_net = Nowcaster()
+        self._nowcast_pv = Nowcaster()
+
+        # hard grid limits, enforced on every meter event (counters persisted)
+        self.grid_cap = GridCap()
+        self._cap_last_cmd_ts: float = 0.0
+
+        # SoC between the device's coarse updates (battery power integrated)
+        self.soc_estimator = SocEstimator()
+
+        # charged/discharged energy from the measured battery power (hourly buckets persisted)
+        self.energy = EnergyMeter()
+
+        # per local day / month totals (persisted, bounded)
+        self.aggregates = PeriodAggregates()
+
+        # battery cycling from the SoC turning points (persisted)
+        self.rainflow = RainflowCounter()
+
+        # rolling distribution of the price slots (adaptive thresholds, persisted)
+        self.price_quantiles = PriceQuantiles()
+
+        # lifetime totals per completed hour, imported into the recorder in batches
+        self.hourly = HourlyTotals()
+
+        # stored energy as FIFO lots with their cost (persisted)
+        self.inventory = EnergyInventory()
+
+        # every state change of soc/pv/grid between cycles (robust per-cycle values)
+        self._samples: dict[str, SampleBuffer] = {}
+        self._invalid_since: dict[str, float] = {}   # entity -> first cycle seen unavailable
+        self._reported_ts: dict[str, float] = {}     # entity -> last_reported of its last valid state
+        self._sample_since: float | None = None
+
+        # ai_logic recommendation (advisory only) and its projection over the plan
+        self._advisory_key: Any = None
+        self._advisory_timeline: list[tuple[float, str]] = []
+
+        # recent decisions (tuples in TRACE_FIELDS order), served on demand
+        self._trace: deque[tuple[Any, ...]] = deque(maxlen=TRACE_LEN)
+
+        # optional long-term copy of the trace on disk (batched, executor)
+        self.history = HistoryLog(hass.config.path(DOMAIN, entry.entry_id))
+        self._history_flush_ts: float = 0.0
+        self._history_flushing = False
+
         super().__init__(
             hass,
             _LOGGER,
@@ -207,9 +388,34 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             self._persist.update(data)
             if "runtime_mode" in data and isinstance(data["runtime_mode"], dict):
                 self.runtime_mode.update(data["runtime_mode"])
+            self.tuner.restore(data.get("tuning"))
+            self.grid_cap.restore(data.get("grid_cap"))
+            self.energy.restore(data.get("energy"))
+            self.aggregates.restore(data.get("aggregates"))
+            self.hourly.restore(data.get("hourly"))
+            self.rainflow.restore(data.get("rainflow"))
+            self.price_quantiles.restore(data.get("price_quantiles"))
+            if "inventory" in data:
+                self.inventory.restore(data.get("inventory"))
+            else:
+                # migration: the former running average becomes one grid lot
+                avg = _to_float(data.get("trade_avg_charge_price"), None)
+                kwh = _to_float(data.get("trade_charged_kwh"), 0.0) or 0.0
+                if avg is not None and kwh > 0:
+                    self.inventory.push(kwh, avg, SOURCE_GRID)
+            for key in ("trade_avg_charge_price", "trade_charged_kwh"):
+                self._persist.pop(key, None)
 
     async def _save(self) -> None:
         self._persist["runtime_mode"] = dict(self.runtime_mode)
+        self._persist["tuning"] = self.tuner.as_dict()
+        self._persist["grid_cap"] = self.grid_cap.as_dict()
+        self._persist["energy"] = self.energy.as_dict()
+        self._persist["inventory"] = self.inventory.as_list()
+        self._persist["aggregates"] = self.aggregates.as_dict()
+        self._persist["hourly"] = self.hourly.as_dict()
+        self._persist["rainflow"] = self.rainflow.as_dict()
+        self._persist["price_quantiles"] = self.price_quantiles.as_dict()
         await self._store.async_save(self._persist)
 
     def _state(self, entity_id: str | None) -> Any:
@@ -305,8 +511,25 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         #     blocking=False,
         # )
 
-    async def _set_za_mode(self, mode: str, watts: float) -> None:
-
+    @staticmethod
+    def _expected_power(mode: str, watts: float) -> float | None:
+        """Device power the ZA manager should report for a command (+charge / -discharge)."""
+        if mode == ZENDURE_MANAGER_CHARGE:
+            return float(watts)
+        if mode == ZENDURE_MANAGER_OFF:
+            return 0.0
+        return None  # smart: the manager regulates itself
+
+    async def _set_za_mode(self, mode: str, watts: float, force: bool = False) -> None:
+        """Set ZA manager mode + power; unchanged commands are only re-sent by the actuator feedback."""
+        expected = self._expected_power(mode, watts)
+        # Im manuellen Modus IMMER setzen
+        if (
+            not force
+            and self.runtime_mode.get("ai_mode") != AI_MODE_MANUAL
+            and self.actuator.is_current(mode, expected)
+        ):
+            return
 
         await self.hass.services.async_call(
             "select",
@@ -320,8 +543,311 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             {"entity_id": self.entities.za_power, "value": watts},
             blocking=False,
         )
+        self.actuator.command(mode, expected, time.monotonic())
 
 
+    async def _set_za_power(self, watts: float) -> None:
+        await self.hass.services.async_call(
+            "number",
+            "set_value",
+            {"entity_id": self.entities.za_power, "value": watts},
+            blocking=False,
+        )
+        self.actuator.command(ZENDURE_MANAGER_CHARGE, float(watts), time.monotonic())
+
+    # --------------------------------------------------
+    # fast PI control on grid-meter events
+    # --------------------------------------------------
+    @callback
+    def async_start_event_listeners(self) -> None:
+        """Subscribe to grid-meter and device state changes (unsubscribed on entry unload)."""
+        input_entities = [
+            e
+            for e in (
+                self.entities.soc,
+                self.entities.pv,
+                self.entities.grid_power,
+                self.entities.grid_import,
+                self.entities.grid_export,
+            )
+            if e
+        ]
+        self.entry.async_on_unload(
+            async_track_state_change_event(self.hass, input_entities, self._async_on_sample_event)
+        )
+
+        device_entities = [
+            e
+            for e in (self.entities.za_mode, self.entities.za_power, self.entities.battery_power)
+            if e
+        ]
+        self.entry.async_on_unload(
+            async_track_state_change_event(self.hass, device_entities, self._async_on_device_event)
+        )
+
+        grid_entities = [
+            e
+            for e in (self.entities.grid_power, self.entities.grid_import, self.entities.grid_export)
+            if e
+        ]
+        if self.entities.grid_mode != GRID_MODE_NONE and grid_entities:
+            self.entry.async_on_unload(
+                async_track_state_change_event(self.hass, grid_entities, self._async_on_grid_event)
+            )
+
+        self.entry.async_on_unload(
+            async_track_state_change_event(self.hass, [self.entities.pv], self._async_on_pv_event)
+        )
+
+    @callback
+    def _async_on_device_event(self, event: Event) -> None:
+        """Feed the device's reported mode/power into the actuator feedback."""
+        mode = self._state(self.entities.za_mode)
+        if mode in (None, "unknown", "unavailable"):
+            mode = None
+        power_entity = self.entities.battery_power or self.entities.za_power
+        self.actuator.observe(mode, _to_float(self._state(power_entity), None), time.monotonic())
+        self._update_soc_estimate(None, event.time_fired.timestamp())
+
+        new_state = event.data.get("new_state")
+        if event.data.get("entity_id") == self.entities.battery_power and new_state is not None:
+            self.energy.add(new_state.last_updated.timestamp(), _to_float(new_state.state, None))
+
+    def _battery_power_w(self, measured_w: float | None) -> float | None:
+        """Battery power for the SoC estimate (+charge): measured, else the last command."""
+        if measured_w is not None:
+            return float(measured_w)
+        pending = self.actuator.pending
+        return pending.watts if pending is not None else None
+
+    @callback
+    def _update_soc_estimate(self, measured_soc: float | None, ts: float) -> None:
+        """Advance the estimate on every SoC / power event; refresh at once on a threshold crossing."""
+        capacity = self._get_setting(SETTING_BATTERY_CAPACITY_KWH, DEFAULT_BATTERY_CAPACITY_KWH)
+        efficiency = self._get_setting(SETTING_BATTERY_EFFICIENCY, DEFAULT_BATTERY_EFFICIENCY) / 100.0
+        before = self.soc_estimator.soc
+        if measured_soc is not None:
+            self.soc_estimator.correct(measured_soc, ts, capacity, efficiency)
+        else:
+            self.soc_estimator.set_power(
+                self._battery_power_w(self._measured_battery_power()), ts, capacity, efficiency
+            )
+
+        thresholds = (
+            self._get_setting(SETTING_EMERGENCY_SOC, DEFAULT_EMERGENCY_SOC),
+            self._get_setting(SETTING_SOC_MIN, DEFAULT_SOC_MIN),
+            self._get_setting(SETTING_SOC_MAX, DEFAULT_SOC_MAX),
+        )
+        if crossed(before, self.soc_estimator.soc, thresholds):
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_on_sample_event(self, event: Event) -> None:
+        """Capture every input reading between cycles."""
+        new_state = event.data.get("new_state")
+        if new_state is None:
+            return
+        value = _to_float(new_state.state, None)
+        if value is None:
+            return
+        buf = self._samples.setdefault(event.data["entity_id"], SampleBuffer())
+        buf.add(new_state.last_updated.timestamp(), value)
+        if event.data["entity_id"] == self.entities.soc:
+            self._update_soc_estimate(value, new_state.last_updated.timestamp())
+
+    def _age(self, entity_id: str, st: Any, valid: bool, now_ts: float, reported: bool) -> float:
+        """How long an input has not been usable.
+
+        Always counts the time the entity is unavailable, unknown or missing.
+        With `reported`, also the time since its last valid state was written
+        (last_reported, includes re-reports of an unchanged value) – for
+        inputs that report continuously, so a frozen meter goes stale too.
+        """
+        if valid:
+            self._invalid_since.pop(entity_id, None)
+            if reported:
+                self._reported_ts[entity_id] = st.last_reported.timestamp()
+            age = 0.0
+        else:
+            age = now_ts - self._invalid_since.setdefault(entity_id, now_ts)
+        if reported and entity_id in self._reported_ts:
+            age = max(age, now_ts - self._reported_ts[entity_id])
+        return max(age, 0.0)
+
+    def _sampled(self, entity_id: str | None, now_ts: float, reported: bool = False) -> Reading:
+        """Robust value since the last cycle and how long the input has not been usable.
+
+        Without `reported` an unchanged value is not stale – many sensors only
+        write on change (0 W PV all night, idle SoC). While the entity is
+        unavailable, unknown or missing, the last good value is held and the
+        age counts up; before the first good value the reading is None
+        (sensor invalid).
+        """
+        if not entity_id:
+            return Reading(None)
+        st = self.hass.states.get(entity_id)
+        value = _to_float(st.state, None) if st is not None else None
+        buf = self._samples.setdefault(entity_id, SampleBuffer())
+        age = self._age(entity_id, st, value is not None, now_ts, reported)
+
+        if value is None:
+            if not len(buf):
+                return Reading(None)
+            return Reading(buf.robust(self._sample_since), age)
+
+        if not len(buf):
+            buf.add(st.last_updated.timestamp(), value)
+        return Reading(buf.robust(self._sample_since), age)
+
+    def _read(self, entity_id: str | None, now_ts: float, reported: bool = False) -> Reading:
+        """Current value (no sampling, None without a valid state) and how long it has not been usable."""
+        if not entity_id:
+            return Reading(None)
+        st = self.hass.states.get(entity_id)
+        value = _to_float(st.state, None) if st is not None else None
+        return Reading(value, self._age(entity_id, st, value is not None, now_ts, reported))
+
+    def _take_snapshot(self, now_ts: float) -> InputSnapshot:
+        """Read every configured input exactly once for this cycle."""
+        grid_ages: list[float] = []
+
+        def _read_grid(entity_id: str) -> float | None:
+            reading = self._sampled(entity_id, now_ts, reported=True)
+            if reading.age_s is not None:
+                grid_ages.append(reading.age_s)
+            return reading.value
+
+        deficit, surplus = self._get_grid(_read_grid)
+        grid_age = max(grid_ages) if grid_ages else None
+
+        export_state = (
+            self.hass.states.get(self.entities.price_export) if self.entities.price_export else None
+        )
+        pv_states = [self.hass.states.get(e) for e in self.entities.pv_forecast]
+        snapshot = InputSnapshot(
+            ts=now_ts,
+            soc=self._sampled(self.entities.soc, now_ts),
+            pv=self._sampled(self.entities.pv, now_ts),
+            deficit=Reading(deficit, grid_age),
+            surplus=Reading(surplus, grid_age),
+            price_now=self._read(self.entities.price_now, now_ts, reported=True).within(
+                DROP_LIMITS["price_now"]
+            ),
+            battery_power=self._read(self.entities.battery_power, now_ts, reported=True).within(
+                DROP_LIMITS["battery_power"]
+            ),
+            price_export=export_state.attributes if export_state else None,
+            price_unit=export_state.attributes.get("unit_of_measurement") if export_state else None,
+            price_updated=export_state.last_updated if export_state else None,
+            pv_forecast=tuple(st.attributes if st else None for st in pv_states),
+            pv_forecast_updated=tuple(st.last_updated if st else None for st in pv_states),
+        )
+        self._sample_since = now_ts
+        return snapshot
+
+    @callback
+    def _async_on_pv_event(self, event: Event) -> None:
+        pv = _to_float(self._state(self.entities.pv), None)
+        if pv is not None:
+            self._nowcast_pv.add(time.monotonic(), pv)
+
+    async def _async_on_grid_event(self, event: Event) -> None:
+        deficit, surplus = self._get_grid()
+        if deficit is None or surplus is None:
+            return
+
+        now_ts = time.monotonic()
+        net = float(deficit) - float(surplus)
+        measured = self._measured_battery_power()
+        if measured is not None:
+            # export the house would see without the battery (open loop)
+            self._nowcast_net.add(now_ts, -net + measured)
+
+        export_limit, import_limit = self._grid_cap_limits()
+        cap: tuple[float, float] | None = None
+        if export_limit is not None or import_limit is not None:
+            self.grid_cap.observe(net, export_limit, import_limit, now_ts)
+            cap = GridCap.bounds(
+                net + self._battery_u(self._measured_battery_power()), export_limit, import_limit
+            )
+
+        if self._pi_bounds is not None:
+            setpoint = self._get_setting(SETTING_GRID_SETPOINT, DEFAULT_GRID_SETPOINT)
+            u = self._pi.update(net - setpoint, now_ts, *self._pi_bounds)
+            if cap is not None:
+                # hard limit wins over the setpoint; the integrator follows
+                u = self._clamp_battery_u(min(max(u, cap[0]), cap[1]))
+                self._pi.output = u
+            await self._apply_pi_output(u, now_ts)
+            return
+
+        if cap is not None:
+            await self._async_enforce_grid_cap(cap, now_ts)
+
+    def _grid_cap_limits(self) -> tuple[float | None, float | None]:
+        """(export_limit_w, import_limit_w) of the selected cap mode, None = not limited."""
+        mode = self.runtime_mode.get("grid_cap_mode", GRID_CAP_OFF)
+        if mode == GRID_CAP_OFF or self.entities.grid_mode == GRID_MODE_NONE:
+            return None, None
+        export_limit = None
+        import_limit = None
+        if mode in (GRID_CAP_EXPORT, GRID_CAP_BOTH):
+            export_limit = max(self._get_setting(SETTING_GRID_EXPORT_LIMIT, DEFAULT_GRID_EXPORT_LIMIT), 0.0)
+        if mode in (GRID_CAP_IMPORT, GRID_CAP_BOTH):
+            import_limit = max(self._get_setting(SETTING_GRID_IMPORT_LIMIT, DEFAULT_GRID_IMPORT_LIMIT), 0.0)
+        return export_limit, import_limit
+
+    def _measured_battery_power(self) -> float | None:
+        """Live device power (+charge / -discharge) for event handlers."""
+        return _to_float(self._state(self.entities.battery_power), None)
+
+    def _battery_u(self, measured_w: float | None) -> float:
+        """Current battery power (u > 0 discharge): measured if available, else last command."""
+        if measured_w is not None:
+            return -float(measured_w)
+        pending = self.actuator.pending
+        if pending is not None and pending.watts is not None:
+            return -float(pending.watts)
+        return 0.0  # smart/unknown
+
+    def _clamp_battery_u(self, u: float) -> float:
+        """Limit u to what the battery can do right now (power and SoC limits)."""
+        soc = _to_float(self._persist.get("prev_soc"), None)
+        soc_min = self._get_setting(SETTING_SOC_MIN, DEFAULT_SOC_MIN)
+        soc_max = self._get_setting(SETTING_SOC_MAX, DEFAULT_SOC_MAX)
+        lo = -self._get_setting(SETTING_MAX_CHARGE, DEFAULT_MAX_CHARGE)
+        hi = self._get_setting(SETTING_MAX_DISCHARGE, DEFAULT_MAX_DISCHARGE)
+        if soc is not None and soc >= soc_max:
+            lo = 0.0
+        if soc is not None and soc <= soc_min:
+            hi = 0.0
+        return min(max(float(u), lo), hi)
+
+    async def _async_enforce_grid_cap(self, cap: tuple[float, float], now_ts: float) -> None:
+        """Move the battery into the cap bounds right away (between cycles)."""
+        u_cur = self._battery_u(self._measured_battery_power())
+        if cap[0] <= u_cur <= cap[1]:
+            return
+        u = self._clamp_battery_u(min(max(u_cur, cap[0]), cap[1]))
+        if abs(u - u_cur) < PI_MIN_STEP_W or now_ts - self._cap_last_cmd_ts < PI_MIN_INTERVAL_S:
+            return
+        self._cap_last_cmd_ts = now_ts
+        await self._set_za_mode(ZENDURE_MANAGER_CHARGE, -int(round(u, 0)))
+
+    async def _apply_pi_output(self, u: float, now_ts: float, engage: bool = False) -> None:
+        """Send the PI output to the ZA manager (manual mode: +charge / -discharge)."""
+        watts = int(round(u, 0))
+        if engage:
+            await self._set_za_mode(ZENDURE_MANAGER_CHARGE, -watts)
+        else:
+            if self._pi_last_w is not None and abs(watts - self._pi_last_w) < PI_MIN_STEP_W:
+                return
+            if now_ts - self._pi_last_cmd_ts < PI_MIN_INTERVAL_S:
+                return
+            await self._set_za_power(-watts)
+        self._pi_last_w = watts
+        self._pi_last_cmd_ts = now_ts
+
     # --------------------------------------------------
     # settings (stored in config entry options)
     # --------------------------------------------------
@@ -332,19 +858,27 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         except Exception:
             return float(default)
 
-    def _get_grid(self) -> tuple[float | None, float | None]:
+    def _get_grid(
+        self, read: Callable[[str], float | None] | None = None
+    ) -> tuple[float | None, float | None]:
         """
         Returns (deficit_w, surplus_w).
         deficit_w > 0 means importing from grid
         surplus_w > 0 means exporting to grid
+        `read` replaces the direct state read (e.g. robust per-cycle samples).
         """
         mode = self.entities.grid_mode
 
+        def _direct(entity_id: str) -> float | None:
+            return _to_float(self._state(entity_id), None)
+
+        read = read or _direct
+
         if mode == GRID_MODE_NONE:
             return None, None
 
         if mode == GRID_MODE_SINGLE and self.entities.grid_power:
-            gp = _to_float(self._state(self.entities.grid_power), None)
+            gp = read(self.entities.grid_power)
             if gp is None:
                 return None, None
             gp = float(gp)
@@ -353,45 +887,92 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             return 0.0, abs(gp)
 
         if mode == GRID_MODE_SPLIT and self.entities.grid_import and self.entities.grid_export:
-            gi = _to_float(self._state(self.entities.grid_import), None)
-            ge = _to_float(self._state(self.entities.grid_export), None)
+            gi = read(self.entities.grid_import)
+            ge = read(self.entities.grid_export)
             if gi is None or ge is None:
                 return None, None
             return float(gi), float(ge)
 
         return None, None
 
-    def _get_price_now(self) -> float | None:
-        if self.entities.price_now:
-            p = _to_float(self._state(self.entities.price_now), None)
-            if p is not None:
-                return float(p)
-        return None
+    async def _async_update_plan(
+        self, now: Any, soc: float, settings: PlanSettings, snapshot: InputSnapshot
+    ) -> None:
+        """(Re)build the cached full-horizon plan on price or settings change.
+
+        The build runs in the executor under a time budget. If it exceeds the
+        budget or raises, the last good plan stays active and the planning
+        state is marked degraded instead of failing the whole update cycle.
+        """
+        # price_updated changes whenever the price export entity is updated
+        signature = (snapshot.price_updated, snapshot.pv_forecast_updated, settings)
+        if signature == self._plan_signature or signature == self._plan_failed_signature:
+            return
+
+        budget = max(
+            self._get_setting(SETTING_PLANNING_TIME_BUDGET, DEFAULT_PLANNING_TIME_BUDGET),
+            0.1,
+        )
+        # the planner itself only sees plain data from the snapshot; the export
+        # is parsed only when it changed (a settings change reuses the series)
+        export = snapshot.price_export
+        series = self._price_series if snapshot.price_updated == self._price_series_updated else None
+        pv = self._pv_forecast if snapshot.pv_forecast_updated == self._pv_forecast_updated else None
+        price_now = snapshot.price_now.value
+
+        def _build() -> tuple[PriceSeries, PvForecast, PricePlan]:
+            parsed = series
+            if parsed is None:
+                parsed = parse_price_attributes(export, snapshot.price_unit, price_now, now.timestamp())
+            forecast = pv if pv is not None else parse_pv_forecast(snapshot.pv_forecast)
+            return parsed, forecast, build_plan(parsed, now.timestamp(), soc, settings, forecast)
+
+        t0 = time.monotonic()
+        try:
+            parsed, forecast, plan = await asyncio.wait_for(
+                self.hass.async_add_executor_job(_build),
+                timeout=budget,
+            )
+        except asyncio.TimeoutError:
+            self._planning_error = f"time_budget_exceeded ({budget:.1f}s)"
+        except Exception as err:  # planner bug or pathological price data
+            self._planning_error = f"{type(err).__name__}: {err}"
+        else:
+            self._planning_duration_ms = (time.monotonic() - t0) * 1000.0
+            self._planning_degraded = False
+            self._planning_error = None
+            self._price_series = parsed
+            self._price_series_updated = snapshot.price_updated
+            self._pv_forecast = forecast
+            self._pv_forecast_updated = snapshot.pv_forecast_updated
+            self._plan_revision += 1
+            plan.revision = self._plan_revision
+            self._plan = plan
+            self._plan_signature = signature
+            self._plan_failed_signature = None
+            for listener in list(self._plan_listeners):
+                listener()
+            return
+
+        # do not retry the same input every cycle (a hung build keeps its thread)
+        self._planning_duration_ms = (time.monotonic() - t0) * 1000.0
+        self._plan_failed_signature = signature
+        if not self._planning_degraded:
+            _LOGGER.warning(
+                "Price planning failed (%s) – keeping last good plan", self._planning_error
+            )
+        self._planning_degraded = True
 
     def _evaluate_price_planning(
         self,
+        now: Any,
         soc: float,
         soc_max: float,
-        soc_min: float,
         price_now: float | None,
-        expensive: float,
-        very_expensive: float,
-        profit_margin_pct: float,
-        max_charge: float,
-        surplus_w: float | None,
         ai_mode: str,
     ) -> dict[str, Any]:
-        """Price planning: find future peak, then locate cheap window before it."""
-        result: dict[str, Any] = {
-            "action": "none",
-            "watts": 0.0,
-            "status": "not_checked",
-            "blocked_by": None,
-            "next_peak": None,
-            "reason": None,
-            "latest_start": None,
-            "target_soc": None,
-        }
+        """Price planning decision for this cycle – O(1) lookup in the cached plan."""
+        result = empty_result()
 
         if ai_mode != AI_MODE_AUTOMATIC:
             result.update(status="planning_inactive_mode", blocked_by="mode")
@@ -409,108 +990,234 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             result.update(status="planning_no_price_data", blocked_by="price_data")
             return result
 
-        export = self._attr(self.entities.price_export, "data")
-        if not isinstance(export, list):
-            result.update(status="planning_no_price_data", blocked_by="price_data")
+        if self._plan is None:
+            if self._planning_degraded:
+                result.update(status="planning_degraded", blocked_by="planner")
+            else:
+                result.update(status="planning_no_price_data", blocked_by="price_data")
             return result
 
-        now = dt_util.utcnow()
+        return self._plan.decide(now.timestamp(), float(soc), float(price_now))
 
-        # Build future series (timestamp, price)
-        # IMPORTANT FIX: only consider points >= now (no “peaks” from the past that could trigger discharge)
-        future: list[tuple[Any, float]] = []
-        for item in export:
-            if not isinstance(item, dict):
-                continue
+    def _ai_advisory(
+        self,
+        now_ts: float,
+        soc: float,
+        soc_min: float,
+        soc_max: float,
+        pv: float,
+        load: float,
+        price_now: float | None,
+        expensive: float,
+        ai_mode: str,
+    ) -> dict[str, Any]:
+        """ai_logic's view for this cycle – reported only, never actuated.
 
-            ts = (
-                item.get("start_time")
-                or item.get("starts_at")
-                or item.get("start")
-                or item.get("time")
+        The current slot uses the scalar function; with numpy available every
+        upcoming slot is evaluated in one batch per plan revision (expected
+        SoC from the plan, no PV) to find the next recommended charge slot.
+        """
+        plan = self._plan
+        if plan is None or price_now is None or not len(plan):
+            return {}
+        cur = plan.slot_at(now_ts)
+        start = cur if cur is not None else plan.index_at(now_ts)
+        state = calculate_ai_state(
+            soc=soc,
+            soc_min=soc_min,
+            soc_max=soc_max,
+            pv=pv,
+            load=load,
+            price_now=price_now,
+            future_prices=plan.price[start:],
+            expensive_threshold_fixed=expensive,
+            mode=ai_mode,
+        )
+
+        key = (plan.revision, expensive, soc_min, soc_max, ai_mode)
+        if HAS_NUMPY and key != self._advisory_key:
+            self._advisory_key = key
+            n = len(plan)
+            price = plan.price
+            future = [list(price[k:]) + [float("nan")] * k for k in range(n)]
+            batch = calculate_ai_state_batch(
+                soc=[plan.soc[k - 1] if k > 0 else plan.soc_at_build for k in range(n)],
+                soc_min=soc_min,
+                soc_max=soc_max,
+                pv=0.0,
+                load=0.0,
+                price_now=price,
+                future_prices=future,
+                expensive_threshold_fixed=expensive,
+                mode=ai_mode,
             )
-            p = _to_float(item.get("price_per_kwh"), None)
-            if not ts or p is None:
-                continue
+            self._advisory_timeline = list(zip(plan.ts, batch["recommendation"].tolist()))
+
+        next_charge = next(
+            (
+                ts
+                for ts, reco in self._advisory_timeline
+                if ts > now_ts and reco in ("ki_laden", "billig_laden")
+            ),
+            None,
+        )
+        return {
+            "ai_advisory_status": state["ai_status"],
+            "ai_advisory_recommendation": state["recommendation"],
+            "ai_advisory_threshold": round(float(state["expensive_threshold"]), 4),
+            "ai_advisory_next_charge": (
+                dt_util.utc_from_timestamp(next_charge).isoformat() if next_charge is not None else None
+            ),
+        }
 
-            t = dt_util.parse_datetime(str(ts))
-            if not t:
-                continue
+    @property
+    def plan(self) -> PricePlan | None:
+        """Cached full-horizon plan (None until the first successful build)."""
+        return self._plan
 
-            if t >= now:
-                future.append((t, float(p)))
+    def get_plan(self) -> dict[str, Any] | None:
+        """Columnar plan from the current slot on – served on demand, not as attributes."""
+        if self._plan is None:
+            return None
+        return self._plan.as_dict(dt_util.utcnow().timestamp())
 
-        if len(future) < 8:
-            result.update(status="planning_no_price_data", blocked_by="price_data")
-            return result
+    @callback
+    def async_add_plan_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Listen for plan changes (new revision). Returns a remove callback."""
+        self._plan_listeners.append(update_callback)
 
-        # Peak detection (max price in future)
-        peak_time, peak_price = max(future, key=lambda x: x[1])
+        @callback
+        def _remove() -> None:
+            if update_callback in self._plan_listeners:
+                self._plan_listeners.remove(update_callback)
 
-        # No relevant peak -> nothing to do
-        if float(peak_price) < float(expensive) and float(peak_price) < float(very_expensive):
-            result.update(status="planning_no_peak_detected", blocked_by=None)
-            return result
+        return _remove
 
-        # VERY EXPENSIVE PEAK → plan discharge during peak (not immediately)
-        if float(peak_price) >= float(very_expensive) and soc > soc_min:
-            result.update(
-                action="discharge",
-                status="planning_discharge_planned",
-                next_peak=peak_time.isoformat(),
-                reason="discharge_during_price_peak",
-                target_soc=soc_min,
+    async def _async_flush_history(self) -> None:
+        """Write the buffered trace rows to the history log (executor)."""
+        rows = self.history.take()
+        max_mb = self._get_setting(SETTING_HISTORY_LOG_MB, DEFAULT_HISTORY_LOG_MB)
+        if not rows or max_mb <= 0:
+            return
+        self._history_flushing = True
+        try:
+            self.history.rows_dropped += await self.hass.async_add_executor_job(
+                self.history.write, rows, int(max_mb * 1024 * 1024)
             )
-            return result
-
-        # Target price (simple: peak * (1 - margin))
-        margin = max(float(profit_margin_pct or 0.0), 0.0) / 100.0
-        target_price = float(peak_price) * (1.0 - margin)
+        except OSError as err:
+            self.history.rows_dropped += len(rows)
+            _LOGGER.warning("History log write failed (%d rows dropped): %s", len(rows), err)
+        finally:
+            self._history_flushing = False
+
+    async def async_shutdown(self) -> None:
+        await super().async_shutdown()
+        # plan subscribers belong to this coordinator instance; after an unload or
+        # reload they would otherwise keep receiving deltas from a stale plan
+        self._plan_listeners.clear()
+        if not self._history_flushing:
+            await self._async_flush_history()
+
+    def get_trace(self, since: float | None = None, limit: int | None = None) -> dict[str, list[Any]]:
+        """Recent decisions as columnar arrays (optionally only newer than `since`)."""
+        rows = [r for r in self._trace if since is None or r[0] > since]
+        if limit is not None and limit >= 0:
+            rows = rows[-limit:] if limit else []
+        return {name: [r[i] for r in rows] for i, name in enumerate(TRACE_FIELDS)}
+
+    def _fire_transitions(self, current: dict[str, Any], context: dict[str, Any]) -> None:
+        """Fire EVENT_TRANSITION for every tracked value that changed since the last cycle."""
+        previous = self._transition_state
+        self._transition_state = current
+        if previous is None:
+            # first cycle after start: nothing to compare against
+            return
 
-        pre_peak = [(t, p) for (t, p) in future if t < peak_time]
-        if len(pre_peak) < 4:
-            result.update(status="planning_peak_detected_insufficient_window", blocked_by="price_data")
-            return result
+        for kind, new in current.items():
+            old = previous.get(kind)
+            if old == new:
+                continue
 
-        cheap_slots = [(t, p) for (t, p) in pre_peak if float(p) <= float(target_price)]
-        if not cheap_slots:
-            result.update(
-                status="planning_waiting_for_cheap_window",
-                blocked_by="price_data",
-                next_peak=peak_time.isoformat(),
-                reason="waiting_for_cheap_price",
-            )
-            return result
+            payload: dict[str, Any] = {"entry_id": self.entry.entry_id, "kind": kind}
+            if kind == "planned_action":
+                payload.update(
+                    old=old[0] if old else None,
+                    new=new[0],
+                    old_time=old[1] if old else None,
+                    new_time=new[1],
+                )
+            else:
+                payload.update(old=old, new=new)
+            payload.update(context)
+            self.hass.bus.async_fire(EVENT_TRANSITION, payload)
 
-        latest_cheap_time, _latest_cheap_price = max(cheap_slots, key=lambda x: x[0])
-        target_soc = min(float(soc_max), float(soc) + 30.0)
-
-        # In cheap slot now -> charge now
-        if float(price_now) <= float(target_price):
-            watts = max(float(max_charge), 0.0)
-            result.update(
-                action="charge",
-                watts=watts,
-                status="planning_charge_now",
-                next_peak=peak_time.isoformat(),
-                reason="charge_before_price_peak",
-                latest_start=latest_cheap_time.isoformat(),
-                target_soc=target_soc,
-            )
-            return result
+    def _charge_window_start(self, now: Any) -> str:
+        """Start of the planned charge window containing now (stable while it lasts).
 
-        # Not cheap yet -> wait, but expose when latest cheap start is
-        result.update(
-            action="none",
-            status="planning_waiting_for_cheap_window",
-            next_peak=peak_time.isoformat(),
-            reason="waiting_for_cheap_price",
-            latest_start=latest_cheap_time.isoformat(),
-            target_soc=target_soc,
-        )
-        return result
+        Used as the time of a "charge now" action, so the planned action only
+        changes (and EVENT_TRANSITION only fires) when the window does.
+        """
+        plan = self._plan
+        if plan is not None:
+            now_ts = now.timestamp()
+            for window in plan.windows:
+                if window.action == "charge" and window.start <= now_ts < window.end:
+                    return dt_util.utc_from_timestamp(window.start).isoformat()
+            k = plan.slot_at(now_ts)
+            if k is not None:
+                return dt_util.utc_from_timestamp(plan.ts[k]).isoformat()
+        return now.isoformat()
 
     # --------------------------------------------------
+    async def _async_safe_hold(
+        self, soc: float | None, stale_inputs: list[str], sample_age_s: dict[str, float | None]
+    ) -> dict[str, Any]:
+        """Inputs unavailable too long: no decisions on held values, battery to a safe setpoint.
+
+        The ZA manager is switched off (0 W) instead of keeping a possibly
+        discharging setpoint; with a usable SoC the emergency latch still runs.
+        """
+        self._pi_bounds = None
+        self._pi_last_w = None
+
+        emergency_soc = self._get_setting(SETTING_EMERGENCY_SOC, DEFAULT_EMERGENCY_SOC)
+        soc_min = self._get_setting(SETTING_SOC_MIN, DEFAULT_SOC_MIN)
+        if soc is not None and "soc" not in stale_inputs:
+            if soc <= emergency_soc:
+                self._persist["emergency_active"] = True
+            if self._persist.get("emergency_active") and soc >= soc_min:
+                self._persist["emergency_active"] = False
+
+        if self._persist.get("emergency_active"):
+            in_w = min(
+                self._get_setting(SETTING_MAX_CHARGE, DEFAULT_MAX_CHARGE),
+                max(self._get_setting(SETTING_EMERGENCY_CHARGE, DEFAULT_EMERGENCY_CHARGE), 0.0),
+            )
+            await self._set_za_mode(ZENDURE_MANAGER_CHARGE, in_w)
+            self._persist["power_state"] = "charging"
+            reason = "sensor_stale_emergency_charge"
+        else:
+            in_w = 0.0
+            await self._set_za_mode(ZENDURE_MANAGER_OFF, 0)
+            self._persist["power_state"] = "idle"
+            reason = "sensor_stale_hold"
+        await self._save()
+
+        return {
+            "status": STATUS_SENSOR_STALE,
+            "ai_status": AI_STATUS_STANDBY,
+            "recommendation": RECO_EMERGENCY if self._persist.get("emergency_active") else RECO_STANDBY,
+            "debug": "SENSOR_STALE",
+            "details": {
+                "stale_inputs": stale_inputs,
+                "sample_age_s": sample_age_s,
+                "set_input_w": in_w,
+                "set_output_w": 0.0,
+                "emergency_active": bool(self._persist.get("emergency_active")),
+            },
+            "decision_reason": reason,
+        }
+
     async def _async_update_data(self) -> dict[str, Any]:
         try:
             # load persisted state once
@@ -527,12 +1234,20 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             pv_w = 0.0
             price_now = None
 
-            soc = _to_float(self._state(self.entities.soc), None)
-            pv = _to_float(self._state(self.entities.pv), None)
+            now_ts = now.timestamp()
+
+            # one timestamped snapshot of all inputs (soc/pv/grid: robust values
+            # from every reading since the last cycle) – no further state reads
+            snapshot = self._take_snapshot(now_ts)
+            soc = snapshot.soc.value
+            pv = snapshot.pv.value
+            deficit_raw = snapshot.deficit.value
+            surplus_raw = snapshot.surplus.value
+            sample_age_s = snapshot.ages()
+            stale_inputs = snapshot.stale(HOLD_LIMITS)
 
             # EMA helper
             EMA_TAU_S = 45.0
-            now_ts = now.timestamp()
 
             last_ts = self._persist.get("ema_last_ts")
             if last_ts is None:
@@ -561,14 +1276,38 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     "recommendation": RECO_STANDBY,
                     "debug": "SENSOR_INVALID",
                     "details": {
-                        "soc_raw": self._state(self.entities.soc),
-                        "pv_raw": self._state(self.entities.pv),
+                        "soc_raw": soc,
+                        "pv_raw": pv,
+                        "sample_age_s": sample_age_s,
                     },
                     "decision_reason": "sensor_invalid",
                 }
 
-            soc = float(soc)
+            if stale_inputs:
+                return await self._async_safe_hold(soc, stale_inputs, sample_age_s)
+
+            soc_measured = float(soc)
             pv = float(pv)
+            battery_capacity_kwh = self._get_setting(SETTING_BATTERY_CAPACITY_KWH, DEFAULT_BATTERY_CAPACITY_KWH)
+            battery_efficiency = self._get_setting(SETTING_BATTERY_EFFICIENCY, DEFAULT_BATTERY_EFFICIENCY) / 100.0
+
+            # decisions use the estimated SoC (readings are fused on their events;
+            # first cycle or a large jump restarts from the reading)
+            est = self.soc_estimator
+            est.predict(now_ts, battery_capacity_kwh, battery_efficiency)
+            if est.soc is None or abs(est.soc - soc_measured) > SOC_RESYNC_PCT:
+                est.correct(soc_measured, now_ts, battery_capacity_kwh, battery_efficiency)
+            soc = float(est.soc if est.soc is not None else soc_measured)
+
+            # cycling (rainflow on the SoC) and, optionally, its wear cost per kWh discharged
+            efc_before = self.rainflow.efc
+            self.rainflow.add(soc)
+            wear_cost = max(self._get_setting(SETTING_WEAR_COST_PER_CYCLE, DEFAULT_WEAR_COST_PER_CYCLE), 0.0)
+            wear_cost_kwh = wear_cost / max(battery_capacity_kwh, 0.1)
+            if self.rainflow.efc > efc_before:
+                self._persist["wear_eur"] = (
+                    float(self._persist.get("wear_eur") or 0.0) + (self.rainflow.efc - efc_before) * wear_cost
+                )
 
             soc_min = self._get_setting(SETTING_SOC_MIN, DEFAULT_SOC_MIN)
             soc_max = self._get_setting(SETTING_SOC_MAX, DEFAULT_SOC_MAX)
@@ -577,6 +1316,25 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
             expensive = self._get_setting(SETTING_PRICE_THRESHOLD, DEFAULT_PRICE_THRESHOLD)
             very_expensive = self._get_setting(SETTING_VERY_EXPENSIVE_THRESHOLD, DEFAULT_VERY_EXPENSIVE_THRESHOLD)
+
+            # every started price slot of the cached plan enters the rolling distribution;
+            # thresholds given as percentiles follow it (fixed € values until enough slots)
+            if self._plan is not None:
+                self.price_quantiles.feed(self._plan.ts, self._plan.price, now_ts)
+            thresholds_adaptive = False
+            for pct_key, pct_default in (
+                (SETTING_PRICE_THRESHOLD_PCT, DEFAULT_PRICE_THRESHOLD_PCT),
+                (SETTING_VERY_EXPENSIVE_PCT, DEFAULT_VERY_EXPENSIVE_PCT),
+            ):
+                pct = self._get_setting(pct_key, pct_default)
+                q = self.price_quantiles.quantile(pct / 100.0) if pct > 0 else None
+                if q is None:
+                    continue
+                thresholds_adaptive = True
+                if pct_key == SETTING_PRICE_THRESHOLD_PCT:
+                    expensive = round(q, 4)
+                else:
+                    very_expensive = round(q, 4)
             emergency_soc = self._get_setting(SETTING_EMERGENCY_SOC, DEFAULT_EMERGENCY_SOC)
             emergency_w = self._get_setting(SETTING_EMERGENCY_CHARGE, DEFAULT_EMERGENCY_CHARGE)
             profit_margin_pct = self._get_setting(SETTING_PROFIT_MARGIN_PCT, DEFAULT_PROFIT_MARGIN_PCT)
@@ -584,8 +1342,8 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             ai_mode = self.runtime_mode.get("ai_mode", AI_MODE_AUTOMATIC)
             manual_action = self.runtime_mode.get("manual_action", MANUAL_STANDBY)
 
-            deficit_raw, surplus_raw = self._get_grid()
-            price_now = self._get_price_now()
+            # an unavailable or outdated current price is dropped (planning reports it)
+            price_now = snapshot.price_now.value
 
             deficit_raw = float(deficit_raw) if deficit_raw is not None else 0.0
             no_deficit = deficit_raw <= 30.0
@@ -599,7 +1357,31 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
             house_load_raw = pv_w + grid_import - grid_export
             house_load_raw = max(house_load_raw, 0.0)
+
+            # self-tuning ramps / hysteresis from observed load and device response
+            self.tuner.add_sample(
+                house_load_raw,
+                surplus_raw,
+                deficit_raw - surplus_raw if self.entities.grid_mode != GRID_MODE_NONE else None,
+            )
+            self.tuner.update(self.actuator.stats().get("actuator_latency_p50"))
             house_load = _ema("ema_house_load", house_load_raw) or house_load_raw
+
+            # feed-forward: extrapolate the recent trend one meter update ahead.
+            # The trend must not contain the battery's own reaction (that would
+            # feed back on itself): net export minus measured battery power,
+            # else PV alone.
+            mono = time.monotonic()
+            measured = snapshot.battery_power.value
+            if self.entities.grid_mode != GRID_MODE_NONE and measured is not None:
+                self._nowcast_net.add(mono, surplus_raw - deficit_raw + float(measured))
+            self._nowcast_pv.add(mono, pv_w)
+            nowcast = self._nowcast_net
+            trend = nowcast.slope(mono)
+            if trend is None:
+                nowcast = self._nowcast_pv
+                trend = nowcast.slope(mono)
+            surplus_ff = feed_forward(trend, nowcast.lead_s(mono))
             no_house_load = house_load < 120.0
 
             # Winter detection
@@ -613,8 +1395,8 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             # PV surplus hysteresis
             PV_STOP_W = 80.0
             PV_CLEAR_W = 30.0
-            PV_STOP_N = 3
-            PV_CLEAR_N = 6
+            PV_STOP_N = self.tuner.pv_stop_n
+            PV_CLEAR_N = self.tuner.pv_clear_n
 
             if surplus > PV_STOP_W:
                 self._persist["pv_surplus_cnt"] = int(self._persist.get("pv_surplus_cnt") or 0) + 1
@@ -635,7 +1417,8 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 self._persist["emergency_active"] = False
 
             # IMPORTANT FIX: define this early (it is used later in the decision logic)
-            avg_charge_price = self._persist.get("trade_avg_charge_price")
+            # cost of the energy the next discharge would draw (FIFO, not an average)
+            draw_cost = self.inventory.peek_price()
 
             # Decide setpoints
             status = STATUS_OK
@@ -657,19 +1440,39 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             self._persist["planning_target_soc"] = None
             self._persist["planning_next_peak"] = None
 
+            await self._async_update_plan(
+                now,
+                soc,
+                PlanSettings(
+                    soc_min=soc_min,
+                    soc_max=soc_max,
+                    expensive=expensive,
+                    very_expensive=very_expensive,
+                    profit_margin_pct=profit_margin_pct,
+                    max_charge=max_charge,
+                    max_discharge=max_discharge,
+                    capacity_kwh=battery_capacity_kwh,
+                    wear_cost_kwh=wear_cost_kwh,
+                    pv_share_pct=(
+                        self._get_setting(SETTING_PV_FORECAST_SHARE_PCT, DEFAULT_PV_FORECAST_SHARE_PCT)
+                        if self.entities.pv_forecast
+                        else 0.0
+                    ),
+                ),
+                snapshot,
+            )
             planning = self._evaluate_price_planning(
+                now,
                 soc=soc,
                 soc_max=soc_max,
-                soc_min=soc_min,
                 price_now=price_now,
-                expensive=expensive,
-                very_expensive=very_expensive,
-                profit_margin_pct=profit_margin_pct,
-                max_charge=max_charge,
-                surplus_w=surplus,
                 ai_mode=ai_mode,
             )
 
+            # current slot of the cached plan (O(1) – the schedule itself is served on demand)
+            plan_slot = self._plan.slot_at(now.timestamp()) if self._plan is not None else None
+            planned_slot_action = self._plan.action[plan_slot] if plan_slot is not None else "none"
+
             self._persist["planning_checked"] = True
             self._persist["planning_status"] = planning.get("status")
             self._persist["planning_blocked_by"] = planning.get("blocked_by")
@@ -695,7 +1498,7 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
 
             elif planning.get("status") == "planning_charge_now":
                 next_action = "charge"
-                next_time = now.isoformat()
+                next_time = self._charge_window_start(now)
 
             if next_action:
                 self._persist["next_planned_action"] = next_action
@@ -797,7 +1600,7 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     prev_target = float(self._persist.get("discharge_target_w") or 0.0)
                     raw_target = float(deficit_raw)
 
-                    MAX_STEP = 250.0
+                    MAX_STEP = self.tuner.manual_step
                     if raw_target > prev_target:
                         target = min(prev_target + MAX_STEP, raw_target)
                     else:
@@ -862,8 +1665,8 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     house_target = house_load + prev_target
                     raw_target = min(house_target, max_discharge)
 
-                    MAX_STEP_UP = 120.0
-                    MAX_STEP_DOWN = 40.0
+                    MAX_STEP_UP = self.tuner.step_up
+                    MAX_STEP_DOWN = self.tuner.step_down
                     if raw_target > prev_target:
                         target = min(prev_target + MAX_STEP_UP, raw_target)
                     else:
@@ -879,7 +1682,7 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 elif power_state == "charging":
                     ac_mode = ZENDURE_MODE_INPUT
                     recommendation = RECO_CHARGE
-                    in_w = min(float(max_charge), max(float(surplus), 0.0))
+                    in_w = min(float(max_charge), max(float(surplus) + surplus_ff, 0.0))
                     out_w = 0.0
                     decision_reason = decision_reason if decision_reason.startswith("state_enter") else "state_charging"
 
@@ -906,14 +1709,14 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                         price_now >= expensive
                         and power_state == "idle"
                         and deficit_raw > 0.0
-                        and avg_charge_price is not None
-                        and price_now > float(avg_charge_price)
+                        and draw_cost is not None
+                        and price_now > float(draw_cost) + wear_cost_kwh
                     ):
                         ac_mode = ZENDURE_MODE_OUTPUT
                         recommendation = RECO_DISCHARGE
                         prev_target = float(self._persist.get("discharge_target_w") or 0.0)
                         raw_target = float(deficit_raw)
-                        MAX_STEP_UP = 250.0
+                        MAX_STEP_UP = self.tuner.manual_step
                         if raw_target > prev_target:
                             target = min(prev_target + MAX_STEP_UP, raw_target)
                         else:
@@ -933,6 +1736,31 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     recommendation = RECO_STANDBY
                 decision_reason = "soc_min_enforced"
 
+            # Grid cap: hard limit, overrides planning / state machine / emergency
+            grid_cap_override = False
+            cap_u = 0.0
+            export_limit, import_limit = self._grid_cap_limits()
+            if export_limit is not None or import_limit is not None:
+                net = deficit_raw - surplus_raw
+                self.grid_cap.observe(net, export_limit, import_limit, mono)
+                cap_lo, cap_hi = GridCap.bounds(net + self._battery_u(snapshot.battery_power.value), export_limit, import_limit)
+                u_plan = (out_w if ac_mode == ZENDURE_MODE_OUTPUT else 0.0) - (
+                    in_w if ac_mode == ZENDURE_MODE_INPUT else 0.0
+                )
+                if not cap_lo <= u_plan <= cap_hi:
+                    grid_cap_override = True
+                    cap_u = self._clamp_battery_u(min(max(u_plan, cap_lo), cap_hi))
+                    decision_reason = "grid_cap_export" if u_plan > cap_hi else "grid_cap_import"
+                    ac_mode = ZENDURE_MODE_OUTPUT if cap_u > 0 else ZENDURE_MODE_INPUT
+                    in_w = max(-cap_u, 0.0)
+                    out_w = max(cap_u, 0.0)
+                    recommendation = (
+                        RECO_DISCHARGE if cap_u > 0 else RECO_CHARGE if cap_u < 0 else RECO_STANDBY
+                    )
+
+            if self._planning_degraded:
+                status = STATUS_DEGRADED
+
             # Apply hardware setpoints
             if ac_mode == ZENDURE_MODE_OUTPUT:
                 in_w = 0.0
@@ -945,9 +1773,56 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             #         await self._set_output_limit(0)
             #         _LOGGER.debug("Zendure: forcing output_limit=0 before switching to AC INPUT")
 
+            # Fast PI control: the cycle only decides direction and bounds,
+            # the controller follows the grid meter between cycles
+            pi_bounds: tuple[float, float] | None = None
+            if (
+                self.runtime_mode.get("control_mode") == CONTROL_MODE_PI
+                and not self._persist.get("emergency_active")
+                and not grid_cap_override
+            ):
+                if ac_mode == ZENDURE_MODE_OUTPUT and out_w > 0:
+                    pi_bounds = (0.0, float(max_discharge))
+                elif (
+                    ac_mode == ZENDURE_MODE_INPUT
+                    and in_w > 0
+                    and decision_reason in ("state_enter_charge", "state_charging")
+                ):
+                    pi_bounds = (-float(max_charge), 0.0)
+
+            # Actuator feedback: device did not reach the last command in time -> send again
+            if self.actuator.needs_resend(time.monotonic()):
+                pending = self.actuator.pending
+                if pending is not None:
+                    _LOGGER.debug(
+                        "Zendure: %s/%s W not confirmed by device – resending", pending.mode, pending.watts
+                    )
+                    await self._set_za_mode(
+                        pending.mode,
+                        pending.watts if pending.watts is not None else 0,
+                        force=True,
+                    )
+
             #########################################################################################################################################
             # Anpassung an ZA Manager!
-            if(ac_mode == ZENDURE_MODE_INPUT):
+            if pi_bounds is not None:
+                engage = self._pi_bounds is None
+                if engage:
+                    self._pi.reset(out_w if ac_mode == ZENDURE_MODE_OUTPUT else -in_w)
+                else:
+                    self._pi.output = min(max(self._pi.output, pi_bounds[0]), pi_bounds[1])
+                self._pi_bounds = pi_bounds
+                if engage:
+                    await self._apply_pi_output(self._pi.output, time.monotonic(), engage=True)
+
+                u = float(self._pi.output)
+                in_w = max(-u, 0.0)
+                out_w = max(u, 0.0)
+                z_manager_mode = ZENDURE_MANAGER_CHARGE
+            elif grid_cap_override:
+                await self._set_za_mode(ZENDURE_MANAGER_CHARGE, -int(round(cap_u, 0)))
+                z_manager_mode = ZENDURE_MANAGER_CHARGE
+            elif(ac_mode == ZENDURE_MODE_INPUT):
                 await self._set_za_mode(ZENDURE_MANAGER_CHARGE, in_w)
                 z_manager_mode = ZENDURE_MANAGER_CHARGE
             elif(ac_mode == ZENDURE_MODE_OUTPUT 
@@ -958,6 +1833,10 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 await self._set_za_mode(ZENDURE_MANAGER_OFF, 0)
                 z_manager_mode = ZENDURE_MANAGER_OFF
 
+            if pi_bounds is None:
+                self._pi_bounds = None
+                self._pi_last_w = None
+
 
             # await self._set_ac_mode(ac_mode)
 
@@ -985,7 +1864,7 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             # NEXT PLANNED ACTION (transparency – do NOT overwrite future planning)
             if planning.get("status") == "planning_charge_now":
                 self._persist["next_planned_action"] = "charge"
-                self._persist["next_planned_action_time"] = now.isoformat()
+                self._persist["next_planned_action_time"] = self._charge_window_start(now)
             elif planning.get("status") == "planning_waiting_for_cheap_window":
                 self._persist["next_planned_action"] = "charge"
                 self._persist["next_planned_action_time"] = planning.get("latest_start")
@@ -999,7 +1878,7 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             else:
                 self._persist["next_action_time"] = None
 
-            if not is_charging and not is_discharging and not planning_override:
+            if not is_charging and not is_discharging and not planning_override and not grid_cap_override:
                 recommendation = RECO_STANDBY
                 decision_reason = "state_idle"
 
@@ -1037,51 +1916,62 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             charged_kwh = float(self._persist.get("charged_kwh") or 0.0)
             discharged_kwh = float(self._persist.get("discharged_kwh") or 0.0)
             profit_eur = float(self._persist.get("profit_eur") or 0.0)
+            profit_before = profit_eur
 
-            trade_charged_kwh = float(self._persist.get("trade_charged_kwh") or 0.0)
-            prev_soc = self._persist.get("prev_soc")
+            # energy: measured battery power (trapezoidal, every state event) if
+            # available, otherwise the commanded setpoints over the cycle time
+            if self.entities.battery_power:
+                self.energy.add(now_ts, snapshot.battery_power.value)
+                e_in_kwh, e_out_kwh = self.energy.take()
+            else:
+                e_in_kwh = (in_w_f * dt_s) / 3600000.0 if ac_mode == ZENDURE_MODE_INPUT else 0.0
+                e_out_kwh = (out_w_f * dt_s) / 3600000.0 if ac_mode == ZENDURE_MODE_OUTPUT else 0.0
+
+            # cost basis: charged energy enters the FIFO inventory as a lot
+            # (PV surplus at the feed-in price it would have earned, grid energy
+            # the import price), discharges consume the oldest lots; losses are
+            # priced in via the efficiency. The energy flowed during the last
+            # interval, so it is booked with the lot decided for that interval.
+            if decision_reason in ("state_enter_charge", "state_charging", "grid_cap_export"):
+                lot_now = [SOURCE_PV, max(self._get_setting(SETTING_FEED_IN_PRICE, DEFAULT_FEED_IN_PRICE), 0.0)]
+            else:
+                lot_now = [SOURCE_GRID, price_now if price_now is not None else self.inventory.avg_price()]
+            if e_in_kwh > 0.0:
+                charged_kwh += e_in_kwh
+                source, c_price = self._persist.get("charge_lot") or lot_now
+                if c_price is None:
+                    c_price = self.inventory.avg_price() or 0.0
+                self.inventory.push(e_in_kwh * battery_efficiency, float(c_price) / battery_efficiency, source)
+            self._persist["charge_lot"] = lot_now
+
+            if e_out_kwh > 0.0:
+                discharged_kwh += e_out_kwh
+                taken_kwh, cost_eur = self.inventory.pop(e_out_kwh / battery_efficiency)
+                if price_now is not None and taken_kwh > 0.0:
+                    gain = taken_kwh * battery_efficiency * float(price_now) - cost_eur
+                    if gain > 0:
+                        profit_eur += gain
+
+            # never more than the usable energy actually in the battery
+            self.inventory.trim(max(soc - soc_min, 0.0) / 100.0 * battery_capacity_kwh)
+            avg_charge_price = self.inventory.avg_price()
+
+            # day / month buckets (local calendar); long pauses (restart) are not extrapolated
+            local_day = dt_util.as_local(now).date()
+            dt_h = dt_s / 3600.0 if dt_s <= 6 * UPDATE_INTERVAL else 0.0
+            self.aggregates.add(
+                local_day,
+                charged_kwh=e_in_kwh,
+                discharged_kwh=e_out_kwh,
+                profit_eur=profit_eur - profit_before,
+                pv_kwh=pv_w * dt_h / 1000.0,
+                load_kwh=house_load_raw * dt_h / 1000.0,
+                import_kwh=deficit_raw * dt_h / 1000.0,
+                export_kwh=surplus_raw * dt_h / 1000.0,
+            )
+            today = self.aggregates.day(local_day, battery_capacity_kwh)
+            this_month = self.aggregates.month(local_day, battery_capacity_kwh)
 
-            SOC_EPS = 0.2
-            if (
-                prev_soc is not None
-                and float(prev_soc) > float(soc_min) + SOC_EPS
-                and float(soc) <= float(soc_min) + SOC_EPS
-                and ac_mode == ZENDURE_MODE_OUTPUT
-                and out_w_f > 0.0
-            ):
-                avg_charge_price = None
-                trade_charged_kwh = 0.0
-
-            if ac_mode == ZENDURE_MODE_INPUT and in_w_f > 0.0:
-                e_kwh = (in_w_f * dt_s) / 3600000.0
-                charged_kwh += e_kwh
-
-                c_price = price_now
-                is_trading_charge = (
-                    recommendation == RECO_CHARGE
-                    and ai_mode != AI_MODE_MANUAL
-                    and decision_reason not in ("emergency_latched_charge", "manual_charge")
-                )
-                if is_trading_charge and c_price is not None:
-                    trade_charged_kwh += e_kwh
-                    if avg_charge_price is None:
-                        avg_charge_price = float(c_price)
-                    else:
-                        prev_e = max(trade_charged_kwh - e_kwh, 0.0)
-                        avg_charge_price = (
-                            (float(avg_charge_price) * prev_e) + (float(c_price) * e_kwh)
-                        ) / max(trade_charged_kwh, 1e-9)
-
-            if ac_mode == ZENDURE_MODE_OUTPUT and out_w_f > 0.0:
-                e_kwh = (out_w_f * dt_s) / 3600000.0
-                discharged_kwh += e_kwh
-                if price_now is not None and avg_charge_price is not None:
-                    delta = float(price_now) - float(avg_charge_price)
-                    if delta > 0:
-                        profit_eur += e_kwh * delta
-
-            self._persist["trade_avg_charge_price"] = avg_charge_price
-            self._persist["trade_charged_kwh"] = trade_charged_kwh
             self._persist["prev_soc"] = float(soc)
             self._persist["avg_charge_price"] = avg_charge_price
 
@@ -1090,17 +1980,72 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             self._persist["profit_eur"] = profit_eur
             self._persist["last_ts"] = now.isoformat()
 
+            # completed hours -> long-term statistics; kept queued while the recorder is down
+            self.hourly.update(now_ts, (charged_kwh, discharged_kwh, profit_eur))
+            if self.hourly.pending:
+                rows = self.hourly.take()
+                try:
+                    if not async_import_hourly(self.hass, self.entry.entry_id, rows):
+                        self.hourly.requeue(rows)
+                except Exception as err:
+                    _LOGGER.warning(
+                        "Long-term statistics import failed (%d hour(s) dropped): %s", len(rows), err
+                    )
+
+            # power after this cycle's commands drives the estimate until the next event
+            est.set_power(
+                self._battery_power_w(snapshot.battery_power.value),
+                now_ts,
+                battery_capacity_kwh,
+                battery_efficiency,
+            )
+
             await self._save()
 
+            trace_row = (
+                int(now.timestamp()),
+                round(soc, 1),
+                int(round(pv_w, 0)),
+                int(round(house_load, 0)),
+                int(round(deficit_raw, 0)),
+                int(round(surplus, 0)),
+                price_now,
+                int(round(in_w_f, 0)),
+                int(round(out_w_f, 0)),
+                decision_reason,
+                ai_status,
+            )
+            self._trace.append(trace_row)
+
+            if self._get_setting(SETTING_HISTORY_LOG_MB, DEFAULT_HISTORY_LOG_MB) > 0:
+                self.history.append(trace_row)
+                if now_ts - self._history_flush_ts >= HISTORY_FLUSH_S and not self._history_flushing:
+                    self._history_flush_ts = now_ts
+                    self.entry.async_create_background_task(
+                        self.hass, self._async_flush_history(), "zendure_smartflow_ai_history"
+                    )
+
+            advisory = self._ai_advisory(
+                now_ts, soc, soc_min, soc_max, pv_w, house_load_raw, price_now, expensive, ai_mode
+            )
+
             details = {
                 "soc": soc,
+                "soc_measured": soc_measured,
+                **est.as_dict(),
+                **advisory,
                 "pv_w": pv_w,
                 "surplus": float(surplus),
+                "surplus_trend_w_s": round(trend, 2) if trend is not None else None,
+                "surplus_ff_w": round(surplus_ff, 1),
                 "deficit": float(deficit_raw),
+                "sample_age_s": sample_age_s,
                 "house_load": int(round(house_load, 0)),
                 "price_now": price_now,
                 "expensive_threshold": expensive,
                 "very_expensive_threshold": very_expensive,
+                "thresholds_adaptive": thresholds_adaptive,
+                "price_slots_observed": self.price_quantiles.slots,
                 "emergency_soc": emergency_soc,
                 "emergency_charge_w": emergency_w,
                 "emergency_active": bool(self._persist.get("emergency_active")),
@@ -1128,16 +2073,73 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 "planning_target_soc": self._persist.get("planning_target_soc"),
                 "planning_next_peak": self._persist.get("planning_next_peak"),
                 "planning_reason": self._persist.get("planning_reason"),
+                "price_source": self._price_series.source,
+                "price_scale": self._price_series.scale,
+                "price_slots": len(self._price_series),
+                "price_resolution_s": self._price_series.resolution_s,
+                "pv_forecast_source": self._pv_forecast.source,
+                "pv_forecast_slots": len(self._pv_forecast),
+                "planning_pv_expected_kwh": (
+                    round(planning["pv_expected_wh"] / 1000.0, 2)
+                    if planning.get("pv_expected_wh") is not None
+                    else None
+                ),
+                "planning_price_rank": planning.get("price_rank"),
+                "planning_price_percentile": (
+                    round(planning["price_percentile"] * 100.0, 1)
+                    if planning.get("price_percentile") is not None
+                    else None
+                ),
+                "planning_degraded": self._planning_degraded,
+                "planning_error": self._planning_error,
+                "planning_duration_ms": (
+                    round(self._planning_duration_ms, 1)
+                    if self._planning_duration_ms is not None
+                    else None
+                ),
+                "plan_revision": self._plan_revision,
+                "planned_slot_action": planned_slot_action,
                 "max_charge": max_charge,
                 "max_discharge": max_discharge,
+                "control_mode": self.runtime_mode.get("control_mode", CONTROL_MODE_TICK),
+                "pi_active": self._pi_bounds is not None,
+                "grid_setpoint": self._get_setting(SETTING_GRID_SETPOINT, DEFAULT_GRID_SETPOINT),
+                **self.actuator.stats(),
+                "grid_cap_mode": self.runtime_mode.get("grid_cap_mode", GRID_CAP_OFF),
+                "grid_export_limit": export_limit,
+                "grid_import_limit": import_limit,
+                "grid_cap_active": grid_cap_override,
+                "grid_cap_violating": self.grid_cap.active,
+                "grid_cap_violations": self.grid_cap.violations,
+                "grid_cap_violation_s": round(self.grid_cap.violation_s, 1),
+                "grid_cap_last_violation_s": round(self.grid_cap.last_violation_s, 1),
                 "set_mode": ac_mode,
                 "z_manager": z_manager_mode,
                 "set_input_w": int(round(in_w_f, 0)),
                 "set_output_w": int(round(out_w_f, 0)),
                 "avg_charge_price": avg_charge_price,
+                "draw_cost": draw_cost,
+                "stored_kwh": round(self.inventory.kwh, 3),
+                "stored_pv_share": self.inventory.share(SOURCE_PV),
                 "charged_kwh": charged_kwh,
                 "discharged_kwh": discharged_kwh,
                 "profit_eur": profit_eur,
+                "profit_today": today["profit_eur"],
+                "charged_today_kwh": today["charged_kwh"],
+                "discharged_today_kwh": today["discharged_kwh"],
+                "cycles_today": today["cycles"],
+                "self_consumption_today": today["self_consumption_pct"],
+                "autarky_today": today["autarky_pct"],
+                "profit_month": this_month["profit_eur"],
+                "cycles_month": this_month["cycles"],
+                "equivalent_full_cycles": round(self.rainflow.efc, 3),
+                "cycle_depth_avg": self.rainflow.mean_depth(),
+                "wear_cost_kwh": round(wear_cost_kwh, 4),
+                "wear_eur": round(float(self._persist.get("wear_eur") or 0.0), 4),
+                "energy_source": "measured" if self.entities.battery_power else "commanded",
+                "energy_hour_charged_kwh": round(self.energy.hour_kwh(now_ts)[0], 4),
+                "energy_hour_discharged_kwh": round(self.energy.hour_kwh(now_ts)[1], 4),
+                "energy_gaps": self.energy.gaps,
                 "profit_margin_pct": profit_margin_pct,
                 "ai_mode": ai_mode,
                 "manual_action": manual_action,
@@ -1157,6 +2159,27 @@ class ZendureSmartFlowCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 else "none"
             )
 
+            self._fire_transitions(
+                {
+                    "power_state": str(self._persist.get("power_state") or "idle"),
+                    "ai_status": ai_status,
+                    "emergency_active": bool(self._persist.get("emergency_active")),
+                    "planned_action": (next_action_state, next_action_time_state or None),
+                },
+                {
+                    "soc": soc,
+                    "price_now": price_now,
+                    "house_load": int(round(house_load, 0)),
+                    "ai_mode": ai_mode,
+                    "decision_reason": decision_reason,
+                    "recommendation": recommendation,
+                    "set_input_w": int(round(in_w_f, 0)),
+                    "set_output_w": int(round(out_w_f, 0)),
+                    "planning_status": self._persist.get("planning_status"),
+                    "planning_next_peak": self._persist.get("planning_next_peak"),
+                },
+            )
+
             return {
                 "status": status,
                 "ai_status": ai_status,
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Diagnostics: configuration, learned control parameters and actuator feedback."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    data = coordinator.data or {}
+    plan = coordinator.plan
+
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "runtime_mode": dict(coordinator.runtime_mode),
+        "tuning": coordinator.tuner.as_dict(),
+        "energy": coordinator.energy.as_dict(),
+        "inventory": coordinator.inventory.as_list(),
+        "aggregates": coordinator.aggregates.as_dict(),
+        "hourly": coordinator.hourly.as_dict(),
+        "history": coordinator.history.stats(),
+        "rainflow": coordinator.rainflow.as_dict(),
+        "price_quantiles": coordinator.price_quantiles.as_dict(),
+        "actuator": {
+            **coordinator.actuator.stats(),
+            **coordinator.actuator.histograms(),
+        },
+        "plan": (
+            {
+                "revision": plan.revision,
+                "slots": len(plan),
+                "slot_s": plan.slot_s,
+                "target_soc": plan.target_soc,
+                "windows": len(plan.windows),
+                "pv_forecast_kwh": round(sum(plan.pv_wh) / 1000.0, 2),
+            }
+            if plan is not None
+            else None
+        ),
+        "last_update_success": coordinator.last_update_success,
+        "details": data.get("details"),
+    }
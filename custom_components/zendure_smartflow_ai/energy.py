@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any
+
+# ==================================================
+# Energy accounting from measured battery power (V1.5)
+# ==================================================
+ENERGY_GAP_S = 300.0        # no reading for longer -> gap, not integrated
+ENERGY_HOURS_KEPT = 48      # hourly buckets kept (and persisted)
+HOUR_S = 3600.0
+
+
+class EnergyMeter:
+    """Trapezoidal integration of the measured battery power.
+
+    Power sign: + charge / - discharge. Segments that change sign are split
+    at the zero crossing, segments across a full hour are split at the hour
+    boundary, so charge and discharge energy land in the right buckets.
+    """
+
+    def __init__(self) -> None:
+        self._last: tuple[float, float] | None = None
+        self.hours: OrderedDict[int, list[float]] = OrderedDict()  # hour start -> [charge_wh, discharge_wh]
+        self.gaps = 0
+        self.gap_s = 0.0
+        self._pending_in_wh = 0.0
+        self._pending_out_wh = 0.0
+
+    # --------------------------------------------------
+    def add(self, ts: float, power_w: float | None) -> None:
+        """Feed one reading (None = unavailable, breaks the integration)."""
+        if power_w is None:
+            self._last = None
+            return
+        ts = float(ts)
+        power_w = float(power_w)
+        last = self._last
+        self._last = (ts, power_w)
+        if last is None:
+            return
+
+        t0, p0 = last
+        dt = ts - t0
+        if dt <= 0:
+            self._last = (t0, power_w) if dt == 0 else last
+            return
+        if dt > ENERGY_GAP_S:
+            self.gaps += 1
+            self.gap_s += dt
+            return
+
+        self._integrate(t0, p0, ts, power_w)
+
+    def _integrate(self, t0: float, p0: float, t1: float, p1: float) -> None:
+        # split at the hour boundary (linear power in between)
+        boundary = (t0 // HOUR_S + 1) * HOUR_S
+        if t1 > boundary:
+            pb = p0 + (p1 - p0) * (boundary - t0) / (t1 - t0)
+            self._integrate(t0, p0, boundary, pb)
+            self._integrate(boundary, pb, t1, p1)
+            return
+
+        dt_h = (t1 - t0) / HOUR_S
+        if p0 * p1 < 0:
+            f = p0 / (p0 - p1)  # share of the segment before the zero crossing
+            a0 = p0 * f * dt_h / 2.0
+            a1 = p1 * (1.0 - f) * dt_h / 2.0
+        else:
+            a0 = (p0 + p1) * dt_h / 2.0
+            a1 = 0.0
+
+        charge_wh = sum(a for a in (a0, a1) if a > 0)
+        discharge_wh = -sum(a for a in (a0, a1) if a < 0)
+
+        bucket = self.hours.get(int(t0 // HOUR_S * HOUR_S))
+        if bucket is None:
+            bucket = [0.0, 0.0]
+            self.hours[int(t0 // HOUR_S * HOUR_S)] = bucket
+            while len(self.hours) > ENERGY_HOURS_KEPT:
+                self.hours.popitem(last=False)
+        bucket[0] += charge_wh
+        bucket[1] += discharge_wh
+        self._pending_in_wh += charge_wh
+        self._pending_out_wh += discharge_wh
+
+    def take(self) -> tuple[float, float]:
+        """(charged_kwh, discharged_kwh) integrated since the last call."""
+        e_in = self._pending_in_wh / 1000.0
+        e_out = self._pending_out_wh / 1000.0
+        self._pending_in_wh = 0.0
+        self._pending_out_wh = 0.0
+        return e_in, e_out
+
+    # --------------------------------------------------
+    def hour_kwh(self, ts: float) -> tuple[float, float]:
+        bucket = self.hours.get(int(ts // HOUR_S * HOUR_S)) or [0.0, 0.0]
+        return bucket[0] / 1000.0, bucket[1] / 1000.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "hours": [[t, round(c, 2), round(d, 2)] for t, (c, d) in self.hours.items()],
+            "gaps": self.gaps,
+            "gap_s": round(self.gap_s, 1),
+        }
+
+    def restore(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        try:
+            for t, c, d in data.get("hours") or []:
+                self.hours[int(t)] = [float(c), float(d)]
+            while len(self.hours) > ENERGY_HOURS_KEPT:
+                self.hours.popitem(last=False)
+            self.gaps = max(int(data.get("gaps", 0)), 0)
+            self.gap_s = max(float(data.get("gap_s", 0.0)), 0.0)
+        except (TypeError, ValueError):
+            return
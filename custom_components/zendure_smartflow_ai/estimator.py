@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Any
+
+# ==================================================
+# SoC estimation between device updates (V1.5)
+# ==================================================
+# One-dimensional Kalman filter: the state is the SoC in %, the prediction
+# integrates the battery power, every real SoC reading is a measurement.
+SOC_MEAS_VAR = 0.35         # %² – 1 % quantisation (1/12) plus sensor error
+SOC_DRIFT_VAR_S = 0.5 / 3600.0  # %² per second without any power information
+POWER_REL_ERR = 0.05        # relative error of the integrated energy
+SOC_MAX_GAP_S = 300.0       # longer gaps are not integrated (power unknown)
+SOC_RESYNC_PCT = 5.0        # estimate this far off a reading -> restart from the reading
+
+
+class SocEstimator:
+    """SoC between coarse device updates (1 % steps, minutes apart).
+
+    Power sign: + charge / - discharge. Charging stores P * eta, discharging
+    drains P / eta.
+    """
+
+    def __init__(self) -> None:
+        self.soc: float | None = None
+        self.var: float = SOC_MEAS_VAR
+        self._ts: float | None = None
+        self._power_w: float | None = None
+        self.corrections = 0
+        self.resyncs = 0
+
+    @property
+    def std(self) -> float:
+        return self.var ** 0.5
+
+    def set_power(self, power_w: float | None, ts: float, capacity_kwh: float, efficiency: float) -> None:
+        """New power reading: integrate the old one up to now first (zero-order hold)."""
+        self.predict(ts, capacity_kwh, efficiency)
+        self._power_w = power_w
+
+    def predict(self, ts: float, capacity_kwh: float, efficiency: float) -> None:
+        if self.soc is None or self._ts is None:
+            self._ts = ts
+            return
+        dt = ts - self._ts
+        if dt <= 0:
+            return
+        self._ts = ts
+
+        if self._power_w is None or dt > SOC_MAX_GAP_S:
+            self.var += SOC_DRIFT_VAR_S * dt
+            return
+
+        eta = min(max(efficiency, 0.5), 1.0)
+        p = self._power_w * eta if self._power_w > 0 else self._power_w / eta
+        d_soc = p * dt / 3600.0 / (max(capacity_kwh, 0.1) * 1000.0) * 100.0
+        self.soc = min(max(self.soc + d_soc, 0.0), 100.0)
+        self.var += SOC_DRIFT_VAR_S * dt + (POWER_REL_ERR * d_soc) ** 2
+
+    def correct(self, measured: float, ts: float, capacity_kwh: float, efficiency: float) -> None:
+        """Fuse a real SoC reading."""
+        self.predict(ts, capacity_kwh, efficiency)
+        if self.soc is None or abs(measured - self.soc) > SOC_RESYNC_PCT:
+            if self.soc is not None:
+                self.resyncs += 1
+            self.soc = float(measured)
+            self.var = SOC_MEAS_VAR
+            self._ts = ts
+            return
+
+        gain = self.var / (self.var + SOC_MEAS_VAR)
+        self.soc = min(max(self.soc + gain * (measured - self.soc), 0.0), 100.0)
+        self.var = (1.0 - gain) * self.var
+        self.corrections += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "soc_estimate": round(self.soc, 2) if self.soc is not None else None,
+            "soc_estimate_std": round(self.std, 2),
+            "soc_estimate_corrections": self.corrections,
+            "soc_estimate_resyncs": self.resyncs,
+        }
+
+
+def crossed(before: float | None, after: float | None, thresholds: tuple[float, ...]) -> bool:
+    """True if the value moved across (or onto) any threshold."""
+    if before is None or after is None or before == after:
+        return False
+    lo, hi = min(before, after), max(before, after)
+    return any(lo < t <= hi for t in thresholds)
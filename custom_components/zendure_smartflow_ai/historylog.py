@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from array import array
+from typing import Any
+
+# ==================================================
+# Append-only per-cycle history log (V1.5)
+# ==================================================
+# One file per UTC day (YYYY-MM-DD.zsh). A file is a sequence of
+# independent blocks, one per batch write:
+#
+#   header  <4s I I I>  magic, rows, payload length, crc32(payload)
+#   payload zlib( numeric columns as int64 deltas | string columns as
+#                 dictionary + uint16 codes )
+#
+# A torn last block (power loss during a write) is skipped by the reader.
+HISTORY_MAGIC = b"ZSH1"
+HISTORY_SUFFIX = ".zsh"
+HISTORY_FLUSH_S = 300.0     # batch write interval
+HISTORY_BUFFER_MAX = 3600   # rows held in memory at most (10 h at 10 s)
+HISTORY_NULL = -(2**62)     # stands for None in numeric columns
+
+# name, fixed-point scale (None = string column) – same order as TRACE_FIELDS
+HISTORY_COLUMNS: tuple[tuple[str, int | None], ...] = (
+    ("ts", 1),
+    ("soc", 10),
+    ("pv_w", 1),
+    ("house_load", 1),
+    ("deficit", 1),
+    ("surplus", 1),
+    ("price_now", 10000),
+    ("set_input_w", 1),
+    ("set_output_w", 1),
+    ("decision_reason", None),
+    ("ai_status", None),
+)
+
+_HEADER = struct.Struct("<4sIII")
+_LEN = struct.Struct("<I")
+
+
+def _encode(rows: list[tuple[Any, ...]]) -> bytes:
+    parts: list[bytes] = []
+    for idx, (_name, scale) in enumerate(HISTORY_COLUMNS):
+        if scale is None:
+            table: dict[str, int] = {}
+            codes = array("H", (table.setdefault(str(r[idx] or ""), len(table)) for r in rows))
+            names = "\x1f".join(table).encode("utf-8")
+            parts += [_LEN.pack(len(names)), names, codes.tobytes()]
+            continue
+        prev = 0
+        deltas = array("q")
+        for r in rows:
+            v = r[idx]
+            cur = HISTORY_NULL if v is None else int(round(float(v) * scale))
+            deltas.append(cur - prev)
+            prev = cur
+        parts.append(deltas.tobytes())
+    return zlib.compress(b"".join(parts), 6)
+
+
+def _decode(payload: bytes, n: int, out: dict[str, Any]) -> None:
+    off = 0
+    for name, scale in HISTORY_COLUMNS:
+        if scale is None:
+            (size,) = _LEN.unpack_from(payload, off)
+            off += _LEN.size
+            table = payload[off : off + size].decode("utf-8").split("\x1f")
+            off += size
+            codes = array("H")
+            codes.frombytes(payload[off : off + 2 * n])
+            off += 2 * n
+            out[name].extend(table[c] or None for c in codes)
+            continue
+        deltas = array("q")
+        deltas.frombytes(payload[off : off + 8 * n])
+        off += 8 * n
+        col = out[name]
+        cur = 0
+        for d in deltas:
+            cur += d
+            col.append(float("nan") if cur == HISTORY_NULL else cur / scale)
+
+
+def read_day(path: str) -> dict[str, Any]:
+    """Columns of one day file: numeric ones as array('d') (NaN = None), strings as lists."""
+    out: dict[str, Any] = {
+        name: (array("d") if scale is not None else []) for name, scale in HISTORY_COLUMNS
+    }
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return out
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            off = 0
+            while off + _HEADER.size <= len(mm):
+                magic, n, size, crc = _HEADER.unpack_from(mm, off)
+                off += _HEADER.size
+                if magic != HISTORY_MAGIC or off + size > len(mm):
+                    break
+                payload = mm[off : off + size]
+                off += size
+                if zlib.crc32(payload) != crc:
+                    break
+                _decode(zlib.decompress(payload), n, out)
+    return out
+
+
+class HistoryLog:
+    """Buffers trace rows in memory and appends them to the day files in batches.
+
+    `append`/`take` run in the event loop, `write` in the executor. Only the
+    loop updates `rows_dropped`; `write` returns its dropped rows instead.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._rows: list[tuple[Any, ...]] = []
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.files_removed = 0
+
+    def append(self, row: tuple[Any, ...]) -> None:
+        self._rows.append(row)
+        if len(self._rows) > HISTORY_BUFFER_MAX:
+            del self._rows[0]
+            self.rows_dropped += 1
+
+    def take(self) -> list[tuple[Any, ...]]:
+        rows = self._rows
+        self._rows = []
+        return rows
+
+    # --------------------------------------------------
+    def path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{day}{HISTORY_SUFFIX}")
+
+    def days(self) -> list[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(n[: -len(HISTORY_SUFFIX)] for n in names if n.endswith(HISTORY_SUFFIX))
+
+    def write(self, rows: list[tuple[Any, ...]], max_bytes: int) -> int:
+        """Append one block per day touched, then drop the oldest days beyond `max_bytes`.
+
+        Returns the number of rows not written (day file already at the cap).
+        """
+        if not rows:
+            return 0
+        dropped = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+        by_day: dict[str, list[tuple[Any, ...]]] = {}
+        for r in rows:
+            by_day.setdefault(time.strftime("%Y-%m-%d", time.gmtime(r[0])), []).append(r)
+
+        for day, day_rows in by_day.items():
+            path = self.path(day)
+            # a single day never grows beyond the cap
+            if os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+                dropped += len(day_rows)
+                continue
+            payload = _encode(day_rows)
+            with open(path, "ab") as f:
+                f.write(_HEADER.pack(HISTORY_MAGIC, len(day_rows), len(payload), zlib.crc32(payload)))
+                f.write(payload)
+            self.rows_written += len(day_rows)
+
+        days = self.days()
+        sizes = [os.path.getsize(self.path(d)) for d in days]
+        total = sum(sizes)
+        for day, size in zip(days[:-1], sizes):
+            if total <= max_bytes:
+                break
+            os.remove(self.path(day))
+            total -= size
+            self.files_removed += 1
+        return dropped
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "rows_buffered": len(self._rows),
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "files_removed": self.files_removed,
+        }
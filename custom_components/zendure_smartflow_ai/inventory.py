@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+# ==================================================
+# FIFO cost basis of the stored energy (V1.5)
+# ==================================================
+SOURCE_PV = "pv"
+SOURCE_GRID = "grid"
+
+INVENTORY_MAX_LOTS = 256    # oldest lots are merged beyond this
+PRICE_MERGE_EPS = 0.0005    # €/kWh – consecutive lots closer than this are merged
+PEEK_KWH = 0.1              # "next energy drawn" for the discharge decision
+
+
+class EnergyInventory:
+    """Stored energy as FIFO lots [kwh, €/kWh, source].
+
+    Charging appends a lot (or grows the newest one), discharging consumes
+    from the oldest lot – so the cost of the energy being drawn is the
+    price it was actually bought at. Push and pop are O(1) amortised.
+    """
+
+    def __init__(self) -> None:
+        self.lots: deque[list[Any]] = deque()
+        self._kwh = 0.0
+        self._cost = 0.0
+
+    @property
+    def kwh(self) -> float:
+        return self._kwh
+
+    def avg_price(self) -> float | None:
+        """Average cost of all stored energy (None if empty)."""
+        if self._kwh <= 1e-9:
+            return None
+        return self._cost / self._kwh
+
+    def share(self, source: str) -> float | None:
+        """Fraction of the stored energy that came from `source`."""
+        if self._kwh <= 1e-9:
+            return None
+        return sum(lot[0] for lot in self.lots if lot[2] == source) / self._kwh
+
+    # --------------------------------------------------
+    def push(self, kwh: float, price: float, source: str) -> None:
+        if kwh <= 0:
+            return
+        price = float(price)
+        last = self.lots[-1] if self.lots else None
+        if last is not None and last[2] == source and abs(last[1] - price) <= PRICE_MERGE_EPS:
+            last[1] = (last[0] * last[1] + kwh * price) / (last[0] + kwh)
+            last[0] += kwh
+        else:
+            self.lots.append([float(kwh), price, source])
+            if len(self.lots) > INVENTORY_MAX_LOTS:
+                self._merge_oldest()
+        self._kwh += kwh
+        self._cost += kwh * price
+
+    def _merge_oldest(self) -> None:
+        a = self.lots.popleft()
+        b = self.lots[0]
+        total = a[0] + b[0]
+        b[1] = (a[0] * a[1] + b[0] * b[1]) / total if total > 0 else b[1]
+        b[0] = total
+        if a[2] != b[2]:
+            b[2] = SOURCE_GRID if SOURCE_GRID in (a[2], b[2]) else b[2]
+
+    def pop(self, kwh: float) -> tuple[float, float]:
+        """Consume `kwh` FIFO. Returns (kwh_taken, cost_eur)."""
+        taken = 0.0
+        cost = 0.0
+        while kwh - taken > 1e-12 and self.lots:
+            lot = self.lots[0]
+            use = min(lot[0], kwh - taken)
+            taken += use
+            cost += use * lot[1]
+            lot[0] -= use
+            if lot[0] <= 1e-9:
+                self.lots.popleft()
+        self._kwh = max(self._kwh - taken, 0.0)
+        self._cost = max(self._cost - cost, 0.0)
+        if not self.lots:
+            self._kwh = 0.0
+            self._cost = 0.0
+        return taken, cost
+
+    def peek_price(self, kwh: float = PEEK_KWH) -> float | None:
+        """Average cost of the next `kwh` that would be drawn (None if empty)."""
+        left = kwh
+        cost = 0.0
+        for lot in self.lots:
+            use = min(lot[0], left)
+            cost += use * lot[1]
+            left -= use
+            if left <= 1e-12:
+                break
+        used = kwh - left
+        return cost / used if used > 1e-9 else None
+
+    def trim(self, max_kwh: float) -> None:
+        """Keep at most what the battery can actually hold (oldest energy goes first)."""
+        excess = self._kwh - max(max_kwh, 0.0)
+        if excess > 1e-9:
+            self.pop(excess)
+
+    # --------------------------------------------------
+    def as_list(self) -> list[list[Any]]:
+        return [[round(k, 4), round(p, 4), s] for k, p, s in self.lots]
+
+    def restore(self, data: Any) -> None:
+        if not isinstance(data, list):
+            return
+        try:
+            for kwh, price, source in data:
+                self.push(float(kwh), float(price), str(source))
+        except (TypeError, ValueError):
+            return
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant
+
+from .analytics import STAT_FIELDS
+from .const import DOMAIN, INTEGRATION_NAME
+
+try:  # HA >= 2025.6
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:  # pragma: no cover - older cores only know has_mean
+    StatisticMeanType = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# statistic suffix, display name, unit (same order as STAT_FIELDS)
+STATISTICS = (
+    ("charged_energy", "charged energy", "kWh"),
+    ("discharged_energy", "discharged energy", "kWh"),
+    ("profit", "profit", "€"),
+)
+
+
+def statistic_id(entry_id: str, suffix: str) -> str:
+    return f"{DOMAIN}:{entry_id.lower()}_{suffix}"
+
+
+def async_import_hourly(hass: HomeAssistant, entry_id: str, rows: list[list[float]]) -> bool:
+    """Queue completed hours ([hour_start, *STAT_FIELDS] lifetime totals) with the recorder.
+
+    One import per statistic for the whole batch; the recorder writes it in its
+    own thread. Returns False if the recorder is not running (rows stay queued).
+    """
+    if not rows:
+        return True
+    if "recorder" not in hass.config.components:
+        return False
+
+    for idx, (suffix, name, unit) in enumerate(STATISTICS):
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{INTEGRATION_NAME} {name}",
+            source=DOMAIN,
+            statistic_id=statistic_id(entry_id, suffix),
+            unit_of_measurement=unit,
+        )
+        if StatisticMeanType is not None:
+            metadata["mean_type"] = StatisticMeanType.NONE
+
+        stats = [
+            StatisticData(
+                start=datetime.fromtimestamp(row[0], tz=timezone.utc),
+                state=row[idx + 1],
+                sum=row[idx + 1],
+            )
+            for row in rows
+        ]
+        async_add_external_statistics(hass, metadata, stats)
+
+    _LOGGER.debug("Imported %d hour(s) of %s into long-term statistics", len(rows), ", ".join(STAT_FIELDS))
+    return True
@@ -11,6 +11,26 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import (
+    DEFAULT_BATTERY_CAPACITY_KWH,
+    DEFAULT_BATTERY_EFFICIENCY,
+    DEFAULT_EMERGENCY_CHARGE,
+    DEFAULT_EMERGENCY_SOC,
+    DEFAULT_FEED_IN_PRICE,
+    DEFAULT_GRID_EXPORT_LIMIT,
+    DEFAULT_GRID_IMPORT_LIMIT,
+    DEFAULT_GRID_SETPOINT,
+    DEFAULT_HISTORY_LOG_MB,
+    DEFAULT_MAX_CHARGE,
+    DEFAULT_MAX_DISCHARGE,
+    DEFAULT_PLANNING_TIME_BUDGET,
+    DEFAULT_PRICE_THRESHOLD_PCT,
+    DEFAULT_PROFIT_MARGIN_PCT,
+    DEFAULT_PV_FORECAST_SHARE_PCT,
+    DEFAULT_SOC_MAX,
+    DEFAULT_SOC_MIN,
+    DEFAULT_VERY_EXPENSIVE_PCT,
+    DEFAULT_VERY_EXPENSIVE_THRESHOLD,
+    DEFAULT_WEAR_COST_PER_CYCLE,
     DOMAIN,
     INTEGRATION_NAME,
     INTEGRATION_MANUFACTURER,
@@ -22,6 +42,7 @@ from .const import (
 @dataclass(frozen=True, kw_only=True)
 class ZendureNumberEntityDescription(NumberEntityDescription):
     runtime_key: str
+    default_value: float  # same default the coordinator falls back to
 
 
 NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
@@ -29,6 +50,7 @@ NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
         key="soc_min",
         translation_key="soc_min",
         runtime_key="soc_min",
+        default_value=DEFAULT_SOC_MIN,
         native_min_value=0,
         native_max_value=100,
         native_step=1,
@@ -39,6 +61,7 @@ NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
         key="soc_max",
         translation_key="soc_max",
         runtime_key="soc_max",
+        default_value=DEFAULT_SOC_MAX,
         native_min_value=0,
         native_max_value=100,
         native_step=1,
@@ -49,6 +72,7 @@ NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
         key="max_charge",
         translation_key="max_charge",
         runtime_key="max_charge",
+        default_value=DEFAULT_MAX_CHARGE,
         native_min_value=0,
         native_max_value=2400,
         native_step=50,
@@ -59,6 +83,7 @@ NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
         key="max_discharge",
         translation_key="max_discharge",
         runtime_key="max_discharge",
+        default_value=DEFAULT_MAX_DISCHARGE,
         native_min_value=0,
         native_max_value=2400,
         native_step=50,
@@ -69,6 +94,7 @@ NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
         key="emergency_charge",
         translation_key="emergency_charge",
         runtime_key="emergency_charge",
+        default_value=DEFAULT_EMERGENCY_CHARGE,
         native_min_value=0,
         native_max_value=2400,
         native_step=50,
@@ -79,6 +105,7 @@ NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
         key="emergency_soc",
         translation_key="emergency_soc",
         runtime_key="emergency_soc",
+        default_value=DEFAULT_EMERGENCY_SOC,
         native_min_value=0,
         native_max_value=100,
         native_step=1,
@@ -89,6 +116,7 @@ NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
         key="profit_margin_pct",
         translation_key="profit_margin_pct",
         runtime_key="profit_margin_pct",
+        default_value=DEFAULT_PROFIT_MARGIN_PCT,
         native_min_value=0,
         native_max_value=1000,
         native_step=1,
@@ -99,12 +127,145 @@ NUMBERS: tuple[ZendureNumberEntityDescription, ...] = (
         key="very_expensive_threshold",
         translation_key="very_expensive_threshold",
         runtime_key="very_expensive_threshold",
+        default_value=DEFAULT_VERY_EXPENSIVE_THRESHOLD,
         native_min_value=0,
         native_max_value=2,
         native_step=0.01,
         native_unit_of_measurement="€/kWh",
         icon="mdi:currency-eur",
     ),
+    ZendureNumberEntityDescription(
+        key="price_threshold_pct",
+        translation_key="price_threshold_pct",
+        runtime_key="price_threshold_pct",
+        default_value=DEFAULT_PRICE_THRESHOLD_PCT,
+        native_min_value=0,
+        native_max_value=100,
+        native_step=1,
+        native_unit_of_measurement="%",
+        icon="mdi:chart-bell-curve-cumulative",
+    ),
+    ZendureNumberEntityDescription(
+        key="very_expensive_pct",
+        translation_key="very_expensive_pct",
+        runtime_key="very_expensive_pct",
+        default_value=DEFAULT_VERY_EXPENSIVE_PCT,
+        native_min_value=0,
+        native_max_value=100,
+        native_step=1,
+        native_unit_of_measurement="%",
+        icon="mdi:chart-bell-curve-cumulative",
+    ),
+    ZendureNumberEntityDescription(
+        key="pv_forecast_share_pct",
+        translation_key="pv_forecast_share_pct",
+        runtime_key="pv_forecast_share_pct",
+        default_value=DEFAULT_PV_FORECAST_SHARE_PCT,
+        native_min_value=0,
+        native_max_value=100,
+        native_step=5,
+        native_unit_of_measurement="%",
+        icon="mdi:solar-power-variant",
+    ),
+    ZendureNumberEntityDescription(
+        key="planning_time_budget",
+        translation_key="planning_time_budget",
+        runtime_key="planning_time_budget",
+        default_value=DEFAULT_PLANNING_TIME_BUDGET,
+        native_min_value=0.5,
+        native_max_value=10,
+        native_step=0.5,
+        native_unit_of_measurement="s",
+        icon="mdi:timer-sand",
+    ),
+    ZendureNumberEntityDescription(
+        key="battery_capacity_kwh",
+        translation_key="battery_capacity_kwh",
+        runtime_key="battery_capacity_kwh",
+        default_value=DEFAULT_BATTERY_CAPACITY_KWH,
+        native_min_value=0.5,
+        native_max_value=50,
+        native_step=0.01,
+        native_unit_of_measurement="kWh",
+        icon="mdi:battery-high",
+    ),
+    ZendureNumberEntityDescription(
+        key="battery_efficiency",
+        translation_key="battery_efficiency",
+        runtime_key="battery_efficiency",
+        default_value=DEFAULT_BATTERY_EFFICIENCY,
+        native_min_value=50,
+        native_max_value=100,
+        native_step=1,
+        native_unit_of_measurement="%",
+        icon="mdi:battery-sync",
+    ),
+    ZendureNumberEntityDescription(
+        key="grid_setpoint",
+        translation_key="grid_setpoint",
+        runtime_key="grid_setpoint",
+        default_value=DEFAULT_GRID_SETPOINT,
+        native_min_value=-800,
+        native_max_value=800,
+        native_step=10,
+        native_unit_of_measurement="W",
+        icon="mdi:transmission-tower",
+    ),
+    ZendureNumberEntityDescription(
+        key="grid_export_limit",
+        translation_key="grid_export_limit",
+        runtime_key="grid_export_limit",
+        default_value=DEFAULT_GRID_EXPORT_LIMIT,
+        native_min_value=0,
+        native_max_value=5000,
+        native_step=10,
+        native_unit_of_measurement="W",
+        icon="mdi:transmission-tower-export",
+    ),
+    ZendureNumberEntityDescription(
+        key="grid_import_limit",
+        translation_key="grid_import_limit",
+        runtime_key="grid_import_limit",
+        default_value=DEFAULT_GRID_IMPORT_LIMIT,
+        native_min_value=0,
+        native_max_value=20000,
+        native_step=50,
+        native_unit_of_measurement="W",
+        icon="mdi:transmission-tower-import",
+    ),
+    ZendureNumberEntityDescription(
+        key="wear_cost_per_cycle",
+        translation_key="wear_cost_per_cycle",
+        runtime_key="wear_cost_per_cycle",
+        default_value=DEFAULT_WEAR_COST_PER_CYCLE,
+        native_min_value=0,
+        native_max_value=10,
+        native_step=0.01,
+        native_unit_of_measurement="€",
+        icon="mdi:battery-heart-variant",
+    ),
+    ZendureNumberEntityDescription(
+        key="feed_in_price",
+        translation_key="feed_in_price",
+        runtime_key="feed_in_price",
+        default_value=DEFAULT_FEED_IN_PRICE,
+        native_min_value=0,
+        native_max_value=1,
+        native_step=0.001,
+        native_unit_of_measurement="€/kWh",
+        icon="mdi:cash-plus",
+    ),
+    ZendureNumberEntityDescription(
+        key="history_log_mb",
+        translation_key="history_log_mb",
+        runtime_key="history_log_mb",
+        default_value=DEFAULT_HISTORY_LOG_MB,
+        native_min_value=0,
+        native_max_value=2000,
+        native_step=10,
+        native_unit_of_measurement="MB",
+        icon="mdi:database-clock",
+    ),
 )
 
 
@@ -128,7 +289,7 @@ async def async_setup_entry(
         if key not in coordinator.runtime_settings:
             coordinator.runtime_settings[key] = entry.options.get(
                 key,
-                ent.entity_description.native_min_value,
+                ent.entity_description.default_value,
             )
 
 
@@ -158,14 +319,15 @@ class ZendureSmartFlowNumber(NumberEntity):
         if description.runtime_key not in coordinator.runtime_settings:
             coordinator.runtime_settings[description.runtime_key] = entry.options.get(
                 description.runtime_key,
-                description.native_min_value,
+                description.default_value,
             )
 
     @property
     def native_value(self) -> float:
         return float(
             self.coordinator.runtime_settings.get(
-                self.entity_description.runtime_key, 0
+                self.entity_description.runtime_key,
+                self.entity_description.default_value,
             )
         )
 
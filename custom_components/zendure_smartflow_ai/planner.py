@@ -0,0 +1,524 @@
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from heapq import merge
+from itertools import accumulate
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .prices import MAX_SLOT_S, PriceSeries
+from .pvforecast import PvForecast
+
+# ==================================================
+# Planning rules (V1.4.x)
+# ==================================================
+# Zeiten statt Slot-Anzahlen – gilt für Stunden- und Viertelstundenpreise gleich
+MIN_FUTURE_S = 8 * 3600.0    # weniger Zukunft -> keine Planung
+MIN_PRE_PEAK_S = 4 * 3600.0  # Zeitfenster vor dem Peak zu kurz
+PLANNING_SOC_STEP = 30.0  # Ziel-SoC = SoC bei Planerstellung + x %
+
+
+@dataclass(frozen=True)
+class PlanSettings:
+    """Settings the plan depends on – a change forces a rebuild."""
+
+    soc_min: float
+    soc_max: float
+    expensive: float
+    very_expensive: float
+    profit_margin_pct: float
+    max_charge: float
+    max_discharge: float
+    capacity_kwh: float
+    wear_cost_kwh: float = 0.0   # €/kWh discharged – battery wear a charge must also earn
+    pv_share_pct: float = 0.0    # share of the PV forecast expected to reach the battery
+
+
+class PriceRankIndex:
+    """Sorted views of the price column, built once per plan.
+
+    Horizon-wide percentiles are one bisect (O(log n)); ranks inside any
+    sub-window [start, end) use a merge-sort tree (O(log² n) bisects on a
+    few hundred slots), so window-relative questions cost nothing per tick.
+    """
+
+    def __init__(self, price: list[float]) -> None:
+        n = len(price)
+        size = 1
+        while size < n:
+            size *= 2
+        tree: list[list[float]] = [[] for _ in range(2 * size)]
+        for k, p in enumerate(price):
+            tree[size + k] = [p]
+        for v in range(size - 1, 0, -1):
+            tree[v] = list(merge(tree[2 * v], tree[2 * v + 1]))
+        self._n = n
+        self._size = size
+        self._tree = tree
+
+    def percentile(self, price: float) -> float | None:
+        """Share of all horizon slots that are cheaper than `price` (0..1)."""
+        if self._n == 0:
+            return None
+        return bisect_left(self._tree[1], price) / self._n
+
+    def rank(self, price: float, start: int, end: int) -> int:
+        """Number of slots in [start, end) cheaper than `price`."""
+        lo = max(start, 0) + self._size
+        hi = min(end, self._n) + self._size
+        count = 0
+        while lo < hi:
+            if lo & 1:
+                count += bisect_left(self._tree[lo], price)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                count += bisect_left(self._tree[hi], price)
+            lo //= 2
+            hi //= 2
+        return count
+
+
+@dataclass(frozen=True)
+class PlanWindow:
+    """Contiguous run of planned charge/discharge slots."""
+
+    action: str          # charge | discharge
+    start: float         # epoch s
+    end: float           # epoch s
+    last_start: float    # start of the last slot (latest start for charging)
+    watts: float
+    soc_start: float
+    soc_end: float
+    peak: float | None   # price peak the window belongs to (epoch s)
+    peak_price: float | None
+
+
+@dataclass
+class PricePlan:
+    """Full-horizon schedule, built once per price/settings change.
+
+    Columns are index aligned (one entry per price slot). The per-slot
+    lookups (peak_idx / cheap_idx) are precomputed so that a planning
+    decision at any point in time is O(1).
+    """
+
+    settings: PlanSettings
+    built_at: float                   # epoch seconds
+    soc_at_build: float
+    slot_s: float | None              # uniform slot length, None if irregular
+    resolution_s: float | None = None  # market resolution (900 / 3600), see PriceSeries
+
+    ts: Sequence[float] = field(default_factory=list)     # slot start (epoch s)
+    price: Sequence[float] = field(default_factory=list)  # €/kWh
+    action: list[str] = field(default_factory=list)     # charge | discharge | none
+    watts: list[float] = field(default_factory=list)
+    soc: list[float] = field(default_factory=list)      # expected SoC at slot end
+
+    # decision lookups for "now" == slot i
+    peak_idx: list[int] = field(default_factory=list)   # first max price in [i, n)
+    cheap_idx: list[int] = field(default_factory=list)  # latest cheap slot in [i, peak), -1 = none
+
+    target_soc: float | None = None
+    revision: int = 0
+
+    # planned charge/discharge windows, derived once per build
+    windows: list[PlanWindow] = field(default_factory=list)
+
+    # price ranks over the horizon / any sub-window
+    ranks: PriceRankIndex | None = None
+
+    # expected PV energy per slot (Wh) and its prefix sums, for O(1) window totals
+    pv_wh: Sequence[float] = field(default_factory=list)
+    pv_cum: list[float] = field(default_factory=list)
+
+    # --------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def index_at(self, now_ts: float) -> int:
+        """First slot starting at/after now (the planner's 'future')."""
+        n = len(self.ts)
+        if n == 0:
+            return 0
+        if self.slot_s:
+            k = math.ceil((now_ts - self.ts[0]) / self.slot_s - 1e-9)
+            return min(max(k, 0), n)
+        return bisect_left(self.ts, now_ts)
+
+    def slot_at(self, now_ts: float) -> int | None:
+        """Slot containing now, None outside the horizon."""
+        n = len(self.ts)
+        if n == 0 or now_ts < self.ts[0]:
+            return None
+        if self.slot_s:
+            k = int((now_ts - self.ts[0]) // self.slot_s)
+        else:
+            k = bisect_left(self.ts, now_ts)
+            if k == n or self.ts[k] > now_ts:
+                k -= 1
+        if k >= n:
+            return None
+        return k if now_ts < self.slot_end(k) else None
+
+    def slot_end(self, k: int) -> float:
+        """End of slot k; a gap in the price data ends the slot (like PriceSeries)."""
+        end = self.ts[k] + (self.slot_s or self.resolution_s or MAX_SLOT_S)
+        if k + 1 < len(self.ts):
+            return min(self.ts[k + 1], end)
+        return end
+
+    def horizon_s(self, i: int) -> float:
+        """Time covered by the price data from the start of slot i on."""
+        n = len(self.ts)
+        if i >= n:
+            return 0.0
+        return self.slot_end(n - 1) - self.ts[i]
+
+    def pv_expected_wh(self, start: int, end: int) -> float:
+        """PV energy expected to reach the battery in slots [start, end)."""
+        if not self.pv_cum or end <= start:
+            return 0.0
+        share = min(max(float(self.settings.pv_share_pct), 0.0), 100.0) / 100.0
+        return (self.pv_cum[end] - self.pv_cum[start]) * share
+
+    def live_target_soc(self, soc: float) -> float:
+        """Target SoC for a decision now: current SoC + PLANNING_SOC_STEP.
+
+        The schedule columns use the target from build time (`target_soc`);
+        decisions follow the current SoC, as before the plan was cached.
+        """
+        return min(float(self.settings.soc_max), float(soc) + PLANNING_SOC_STEP)
+
+    def _grid_need_wh(self, soc: float, k: int, peak: int, target: float | None = None) -> float:
+        """Energy still to charge from the grid in [k, peak): target SoC minus expected PV."""
+        if target is None:
+            target = self.target_soc
+        if target is None:
+            return 0.0
+        s = self.settings
+        need_wh = max(float(target) - float(soc), 0.0) / 100.0 * max(float(s.capacity_kwh), 0.1) * 1000.0
+        return max(need_wh - self.pv_expected_wh(k, peak), 0.0)
+
+    def _slots_needed(self, soc: float, k: int, peak: int, target: float | None = None) -> int:
+        """Charge slots (of slot k's length) to get from `soc` to the target SoC."""
+        watts = max(float(self.settings.max_charge), 0.0)
+        if watts <= 0:
+            return 0
+        slot_h = (self.slot_end(k) - self.ts[k]) / 3600.0
+        return math.ceil(self._grid_need_wh(soc, k, peak, target) / (watts * slot_h) - 1e-9)
+
+    def _among_cheapest(
+        self, price: float, start: int, peak: int, soc: float, target: float | None = None
+    ) -> bool:
+        """Fewer cheaper slots left before the peak than charging still needs."""
+        needed = self._slots_needed(soc, max(start - 1, 0), peak, target)
+        if self.ranks is None or needed <= 0:
+            return True
+        return self.ranks.rank(price, start, peak) < needed
+
+    def _target_price(self, peak_price: float) -> float:
+        margin = max(float(self.settings.profit_margin_pct or 0.0), 0.0) / 100.0
+        return float(peak_price) * (1.0 - margin) - max(float(self.settings.wear_cost_kwh), 0.0)
+
+    @staticmethod
+    def _iso(ts: float) -> str:
+        return dt_util.utc_from_timestamp(ts).isoformat()
+
+    # --------------------------------------------------
+    def decide(self, now_ts: float, soc: float, price_now: float) -> dict[str, Any]:
+        """Planning decision for the current cycle (O(1) lookup)."""
+        result = empty_result()
+        s = self.settings
+        i = self.index_at(now_ts)
+
+        if self.horizon_s(i) < MIN_FUTURE_S:
+            result.update(status="planning_no_price_data", blocked_by="price_data")
+            return result
+
+        p = self.peak_idx[i]
+        peak_price = self.price[p]
+        peak_iso = self._iso(self.ts[p])
+
+        # No relevant peak -> nothing to do
+        if peak_price < float(s.expensive) and peak_price < float(s.very_expensive):
+            result.update(status="planning_no_peak_detected", blocked_by=None)
+            return result
+
+        # VERY EXPENSIVE PEAK → plan discharge during peak (not immediately)
+        if peak_price >= float(s.very_expensive) and soc > s.soc_min:
+            result.update(
+                action="discharge",
+                status="planning_discharge_planned",
+                next_peak=peak_iso,
+                reason="discharge_during_price_peak",
+                target_soc=s.soc_min,
+            )
+            return result
+
+        target_price = self._target_price(peak_price)
+
+        if self.ts[p] - self.ts[i] < MIN_PRE_PEAK_S:
+            result.update(status="planning_peak_detected_insufficient_window", blocked_by="price_data")
+            return result
+
+        c = self.cheap_idx[i]
+        if c < i:
+            result.update(
+                status="planning_waiting_for_cheap_window",
+                blocked_by="price_data",
+                next_peak=peak_iso,
+                reason="waiting_for_cheap_price",
+            )
+            return result
+
+        target_soc = self.live_target_soc(soc)
+        price_rank = self.ranks.rank(float(price_now), i, p) if self.ranks is not None else None
+        # PV from the slot running now on (i is already the next one inside a slot)
+        cur = self.slot_at(now_ts)
+        start = cur if cur is not None else i
+        pv_wh = self.pv_expected_wh(start, p)
+        result.update(
+            price_rank=price_rank,
+            price_percentile=self.ranks.percentile(float(price_now)) if self.ranks is not None else None,
+            pv_expected_wh=round(pv_wh, 1),
+        )
+
+        # Expected PV reaches the target SoC before the peak -> no grid charge
+        if pv_wh > 0 and self._grid_need_wh(soc, start, p, target_soc) <= 0:
+            result.update(
+                action="none",
+                status="planning_pv_expected",
+                next_peak=peak_iso,
+                reason="pv_forecast_covers_target",
+                target_soc=target_soc,
+            )
+            return result
+
+        # Cheap now, but enough cheaper slots still ahead of the peak -> wait for those
+        if float(price_now) <= float(target_price) and not self._among_cheapest(float(price_now), i, p, soc, target_soc):
+            result.update(
+                action="none",
+                status="planning_waiting_for_cheap_window",
+                next_peak=peak_iso,
+                reason="waiting_for_cheaper_slot",
+                latest_start=self._iso(self.ts[c]),
+                target_soc=target_soc,
+            )
+            return result
+
+        # In cheap slot now -> charge now
+        if float(price_now) <= float(target_price):
+            result.update(
+                action="charge",
+                watts=max(float(s.max_charge), 0.0),
+                status="planning_charge_now",
+                next_peak=peak_iso,
+                reason="charge_before_price_peak",
+                latest_start=self._iso(self.ts[c]),
+                target_soc=target_soc,
+            )
+            return result
+
+        # Not cheap yet -> wait, but expose when latest cheap start is
+        result.update(
+            action="none",
+            status="planning_waiting_for_cheap_window",
+            next_peak=peak_iso,
+            reason="waiting_for_cheap_price",
+            latest_start=self._iso(self.ts[c]),
+            target_soc=target_soc,
+        )
+        return result
+
+    def as_dict(self, now_ts: float | None = None) -> dict[str, Any]:
+        """Columnar representation (from the current slot on) for dashboards."""
+        start = 0
+        if now_ts is not None:
+            cur = self.slot_at(now_ts)
+            start = cur if cur is not None else self.index_at(now_ts)
+        return {
+            "revision": self.revision,
+            "built_at": self._iso(self.built_at),
+            "slot_s": self.slot_s,
+            "resolution_s": self.resolution_s,
+            "target_soc": self.target_soc,
+            "ts": [int(t) for t in self.ts[start:]],
+            "price": list(self.price[start:]),
+            "action": self.action[start:],
+            "watts": self.watts[start:],
+            "soc": [round(v, 1) for v in self.soc[start:]],
+            "pv_wh": [round(v, 1) for v in self.pv_wh[start:]],
+        }
+
+
+def empty_result() -> dict[str, Any]:
+    return {
+        "action": "none",
+        "watts": 0.0,
+        "status": "not_checked",
+        "blocked_by": None,
+        "next_peak": None,
+        "reason": None,
+        "latest_start": None,
+        "target_soc": None,
+        "price_rank": None,
+        "price_percentile": None,
+        "pv_expected_wh": None,
+    }
+
+
+def build_plan(
+    series: PriceSeries,
+    now_ts: float,
+    soc: float,
+    settings: PlanSettings,
+    pv: PvForecast | None = None,
+) -> PricePlan:
+    """Build the full-horizon plan. O(n) in the number of price slots.
+
+    The plan keeps the series' columns as they are (no copy). An optional
+    PV forecast is aligned to the price slots once (O(n + m)).
+    """
+    ts = series.ts
+    price = series.price
+    n = len(ts)
+
+    slot_s: float | None = None
+    if n >= 2:
+        diffs = {round(ts[k + 1] - ts[k], 3) for k in range(n - 1)}
+        if len(diffs) == 1:
+            slot_s = float(diffs.pop())
+
+    plan = PricePlan(
+        settings=settings,
+        built_at=float(now_ts),
+        soc_at_build=float(soc),
+        slot_s=slot_s,
+        resolution_s=series.resolution_s,
+        ts=ts,
+        price=price,
+        target_soc=min(float(settings.soc_max), float(soc) + PLANNING_SOC_STEP),
+    )
+    if n == 0:
+        return plan
+
+    # suffix peak: first occurrence of the max price in [i, n)
+    peak_idx = [0] * n
+    best = n - 1
+    for k in range(n - 1, -1, -1):
+        if price[k] >= price[best]:
+            best = k
+        peak_idx[k] = best
+
+    # latest cheap slot before the peak – every peak owns a contiguous range
+    # of "now" indices, so one backward scan per peak keeps this O(n)
+    cheap_idx = [-1] * n
+    k = 0
+    while k < n:
+        p = peak_idx[k]
+        target = plan._target_price(price[p])
+        latest = -1
+        for j in range(p - 1, k - 1, -1):
+            if price[j] <= target:
+                latest = j
+                break
+        for j in range(k, p + 1):
+            cheap_idx[j] = latest if latest >= j else -1
+        k = p + 1
+
+    plan.peak_idx = peak_idx
+    plan.cheap_idx = cheap_idx
+    plan.ranks = PriceRankIndex(price)
+    if pv is not None and len(pv):
+        plan.pv_wh = pv.align(ts, plan.slot_end)
+        plan.pv_cum = list(accumulate(plan.pv_wh, initial=0.0))
+    else:
+        plan.pv_wh = [0.0] * n
+
+    # expected schedule from the build time on
+    cap_wh = max(float(settings.capacity_kwh), 0.1) * 1000.0
+    sim_soc = float(soc)
+    action = ["none"] * n
+    watts = [0.0] * n
+    soc_col = [sim_soc] * n
+    i0 = plan.index_at(now_ts)
+    cur = plan.slot_at(now_ts)
+    if cur is not None:
+        i0 = cur
+
+    for j in range(i0, n):
+        slot_h = (plan.slot_end(j) - ts[j]) / 3600.0
+        p = peak_idx[j]
+        peak_price = price[p]
+        a = "none"
+        w = 0.0
+        very = peak_price >= settings.very_expensive
+        relevant = very or peak_price >= settings.expensive
+
+        if not relevant:
+            pass
+        elif very and sim_soc > settings.soc_min:
+            if j == p:
+                a = "discharge"
+                w = max(float(settings.max_discharge), 0.0)
+                sim_soc = max(sim_soc - w * slot_h / cap_wh * 100.0, float(settings.soc_min))
+        elif (
+            ts[p] - ts[j] >= MIN_PRE_PEAK_S
+            and cheap_idx[j] >= j
+            and price[j] <= plan._target_price(peak_price)
+            and plan.target_soc is not None
+            and sim_soc < plan.target_soc
+            and plan._grid_need_wh(sim_soc, j, p) > 0
+            and plan._among_cheapest(price[j], j + 1, p, sim_soc)
+        ):
+            a = "charge"
+            w = max(float(settings.max_charge), 0.0)
+            sim_soc = min(sim_soc + w * slot_h / cap_wh * 100.0, float(plan.target_soc))
+
+        action[j] = a
+        watts[j] = w
+        soc_col[j] = sim_soc
+
+    plan.action = action
+    plan.watts = watts
+    plan.soc = soc_col
+    plan.windows = _collect_windows(plan, i0)
+    return plan
+
+
+def _collect_windows(plan: PricePlan, start: int) -> list[PlanWindow]:
+    """Merge consecutive slots with the same planned action into windows."""
+    windows: list[PlanWindow] = []
+    n = len(plan.ts)
+    k = start
+    while k < n:
+        a = plan.action[k]
+        if a == "none":
+            k += 1
+            continue
+        j = k
+        # a gap in the price data ends the window
+        while j + 1 < n and plan.action[j + 1] == a and plan.slot_end(j) >= plan.ts[j + 1]:
+            j += 1
+        p = plan.peak_idx[j] if a == "charge" else plan.peak_idx[k]
+        soc_start = plan.soc[k - 1] if k > start else plan.soc_at_build
+        windows.append(
+            PlanWindow(
+                action=a,
+                start=plan.ts[k],
+                end=plan.slot_end(j),
+                last_start=plan.ts[j],
+                watts=max(plan.watts[k:j + 1]),
+                soc_start=soc_start,
+                soc_end=plan.soc[j],
+                peak=plan.ts[p],
+                peak_price=plan.price[p],
+            )
+        )
+        k = j + 1
+    return windows
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from statistics import median
+from typing import Any
+
+# ==================================================
+# Price forecast adapters (V1.5)
+# ==================================================
+# Every supported integration is reduced to the same columnar series
+# (epoch seconds, €/kWh); the planner only ever sees PriceSeries.
+SCALE_EUR_KWH = 1.0
+SCALE_CT_KWH = 0.01
+SCALE_EUR_MWH = 0.001
+
+MAX_SLOT_S = 3600.0         # longest slot a provider publishes (hourly)
+
+# keys normalised: lower case, no spaces, "€" -> "eur"
+_UNIT_SCALES = {
+    "eur/kwh": SCALE_EUR_KWH,
+    "kwh": SCALE_EUR_KWH,       # Nord Pool "unit" without currency
+    "ct/kwh": SCALE_CT_KWH,
+    "c/kwh": SCALE_CT_KWH,
+    "cent/kwh": SCALE_CT_KWH,
+    "eur/mwh": SCALE_EUR_MWH,
+    "mwh": SCALE_EUR_MWH,
+}
+
+
+@dataclass(frozen=True)
+class PriceSeries:
+    """Ascending slot starts and prices in €/kWh as two parallel columns.
+
+    `resolution_s` is the slot length (900 for 15-minute markets, 3600 for
+    hourly ones); mixed series are brought onto the finest grid when parsed.
+    """
+
+    ts: array = field(default_factory=lambda: array("d"))
+    price: array = field(default_factory=lambda: array("d"))
+    source: str = "none"
+    scale: float = SCALE_EUR_KWH
+    resolution_s: float | None = None
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def slot_end(self, k: int) -> float:
+        """End of slot k: the next start, but never longer than one slot (gaps stay gaps)."""
+        ts = self.ts
+        if self.resolution_s:
+            length = self.resolution_s
+        elif k + 1 == len(ts) and k > 0:
+            length = min(ts[k] - ts[k - 1], MAX_SLOT_S)  # unknown grid: last slot like the one before
+        else:
+            length = MAX_SLOT_S
+        if k + 1 < len(ts):
+            return min(ts[k + 1], ts[k] + length)
+        return ts[k] + length
+
+
+def resolution(ts: Any) -> float | None:
+    """Shortest distance between slot starts (None for fewer than two slots)."""
+    best = None
+    for k in range(len(ts) - 1):
+        d = ts[k + 1] - ts[k]
+        if d > 0 and (best is None or d < best):
+            best = d
+    return min(round(best, 3), MAX_SLOT_S) if best is not None else None
+
+
+def resample(series: PriceSeries, slot_s: float) -> PriceSeries:
+    """Series on a uniform `slot_s` grid in O(n + m).
+
+    Longer slots are repeated (hourly -> 15 min), shorter ones averaged
+    weighted by their overlap (15 min -> hourly). Grid slots without any
+    source slot are left out.
+    """
+    ts, price = series.ts, series.price
+    n = len(ts)
+    if n == 0 or slot_s <= 0:
+        return series
+
+    out_ts = array("d")
+    out_price = array("d")
+    t = ts[0] // slot_s * slot_s
+    end = series.slot_end(n - 1)
+    k = 0
+    while t < end:
+        t_end = t + slot_s
+        while k < n and series.slot_end(k) <= t:
+            k += 1
+        acc = 0.0
+        covered = 0.0
+        j = k
+        while j < n and ts[j] < t_end:
+            overlap = min(series.slot_end(j), t_end) - max(ts[j], t)
+            if overlap > 0:
+                acc += price[j] * overlap
+                covered += overlap
+            j += 1
+        if covered > 0:
+            out_ts.append(t)
+            out_price.append(acc / covered)
+        t = t_end
+
+    return PriceSeries(
+        ts=out_ts,
+        price=out_price,
+        source=series.source,
+        scale=series.scale,
+        resolution_s=float(slot_s),
+    )
+
+
+def unit_scale(unit: Any) -> float | None:
+    """Factor to €/kWh for a unit string (None if unknown)."""
+    if not unit:
+        return None
+    key = str(unit).strip().lower().replace(" ", "").replace("€", "eur")
+    return _UNIT_SCALES.get(key)
+
+
+def _epoch(value: Any) -> float | None:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value) / 1000.0 if value > 1e11 else float(value)  # ms or s
+    if isinstance(value, str) and value:
+        try:
+            return _epoch(datetime.fromisoformat(value.strip()))
+        except ValueError:
+            return None
+    return None
+
+
+def _num(value: Any) -> float | None:
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if math.isfinite(v) else None
+
+
+def _points(items: Any, ts_keys: tuple[str, ...], price_keys: tuple[str, ...]) -> list[tuple[float, float]]:
+    points: list[tuple[float, float]] = []
+    if not isinstance(items, list):
+        return points
+    for item in items:
+        if not isinstance(item, Mapping):
+            continue
+        t = next((_epoch(item[k]) for k in ts_keys if item.get(k) is not None), None)
+        p = next((_num(item[k]) for k in price_keys if item.get(k) is not None), None)
+        if t is not None and p is not None:
+            points.append((t, p))
+    return points
+
+
+# --------------------------------------------------
+# adapters: attributes -> (raw points, unit hint) or None if not this format
+# --------------------------------------------------
+Adapter = Callable[[Mapping[str, Any]], "tuple[list[tuple[float, float]], str | None] | None"]
+
+
+def _tibber(attrs: Mapping[str, Any]) -> tuple[list[tuple[float, float]], str | None] | None:
+    """Tibber / EPEX Spot style: data = [{start_time, price_per_kwh | price_ct_per_kwh}]."""
+    data = attrs.get("data")
+    if not isinstance(data, list) or not data or not isinstance(data[0], Mapping):
+        return None
+    ts_keys = ("start_time", "starts_at", "start", "time")
+    if "price_ct_per_kwh" in data[0]:
+        return _points(data, ts_keys, ("price_ct_per_kwh",)), "ct/kWh"
+    if "price_per_kwh" in data[0] or "total" in data[0]:
+        return _points(data, ts_keys, ("price_per_kwh", "total")), None
+    return None
+
+
+def _nordpool(attrs: Mapping[str, Any]) -> tuple[list[tuple[float, float]], str | None] | None:
+    """Nord Pool: raw_today / raw_tomorrow = [{start, end, value}], unit + price_in_cents."""
+    if "raw_today" not in attrs:
+        return None
+    items = list(attrs.get("raw_today") or []) + list(attrs.get("raw_tomorrow") or [])
+    if attrs.get("price_in_cents"):
+        unit = "ct/kWh"
+    else:
+        unit = attrs.get("unit")
+    return _points(items, ("start",), ("value",)), unit
+
+
+def _entsoe(attrs: Mapping[str, Any]) -> tuple[list[tuple[float, float]], str | None] | None:
+    """ENTSO-E: prices = [{time, price}] (or prices_today / prices_tomorrow)."""
+    items = attrs.get("prices")
+    if not isinstance(items, list):
+        if "prices_today" not in attrs:
+            return None
+        items = list(attrs.get("prices_today") or []) + list(attrs.get("prices_tomorrow") or [])
+    if items and isinstance(items[0], Mapping) and "marketprice" in items[0]:
+        return None
+    return _points(items, ("time", "start"), ("price",)), None
+
+
+def _awattar(attrs: Mapping[str, Any]) -> tuple[list[tuple[float, float]], str | None] | None:
+    """aWATTar: [{start_timestamp (ms), marketprice, unit: Eur/MWh}] under data / prices."""
+    for key in ("data", "prices", "forecast"):
+        items = attrs.get(key)
+        if isinstance(items, list) and items and isinstance(items[0], Mapping) and "marketprice" in items[0]:
+            return _points(items, ("start_timestamp", "start"), ("marketprice",)), items[0].get("unit") or "€/MWh"
+    return None
+
+
+PRICE_ADAPTERS: tuple[tuple[str, Adapter], ...] = (
+    ("awattar", _awattar),
+    ("tibber", _tibber),
+    ("nordpool", _nordpool),
+    ("entsoe", _entsoe),
+)
+
+
+def detect_scale(
+    ts: list[float],
+    raw: list[float],
+    unit: Any = None,
+    price_now: float | None = None,
+    now_ts: float | None = None,
+) -> float:
+    """€/kWh factor: explicit unit, else the magnitude matching the current price, else a guess."""
+    scale = unit_scale(unit)
+    if scale is not None:
+        return scale
+    if price_now and now_ts is not None:
+        k = bisect_right(ts, now_ts) - 1
+        if 0 <= k < len(raw) and raw[k]:
+            ratio = abs(price_now)
+            return min(
+                (SCALE_EUR_KWH, SCALE_CT_KWH, SCALE_EUR_MWH),
+                key=lambda c: abs(math.log(max(abs(raw[k]) * c, 1e-9) / ratio)),
+            )
+    if not raw:
+        return SCALE_EUR_KWH
+    typical = median(abs(v) for v in raw)
+    if typical >= 100.0:
+        return SCALE_EUR_MWH
+    if typical >= 2.0:
+        return SCALE_CT_KWH
+    return SCALE_EUR_KWH
+
+
+def parse_price_attributes(
+    attrs: Mapping[str, Any] | None,
+    unit: Any = None,
+    price_now: float | None = None,
+    now_ts: float | None = None,
+) -> PriceSeries:
+    """Price entity attributes of any supported integration -> PriceSeries (€/kWh).
+
+    `unit` is the entity's unit_of_measurement; adapter hints (price_in_cents,
+    per-item units) take precedence over it.
+    """
+    if not attrs:
+        return PriceSeries()
+    for name, adapter in PRICE_ADAPTERS:
+        parsed = adapter(attrs)
+        if parsed is None:
+            continue
+        points, hint = parsed
+        dedup = dict(points)
+        ts = array("d", sorted(dedup))
+        raw = [dedup[t] for t in ts]
+        scale = detect_scale(ts, raw, hint or unit, price_now, now_ts)
+        series = PriceSeries(
+            ts=ts,
+            price=array("d", (v * scale for v in raw)),
+            source=name,
+            scale=scale,
+        )
+        res = resolution(ts)
+        if res is None:
+            return series
+        # e.g. hourly today, 15-minute tomorrow -> everything on the 15-minute grid
+        if any(res < ts[k + 1] - ts[k] <= MAX_SLOT_S for k in range(len(ts) - 1)):
+            return resample(series, res)
+        return replace(series, resolution_s=res)
+    return PriceSeries()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from .prices import _epoch, _num, resolution
+
+# ==================================================
+# PV forecast (V1.5)
+# ==================================================
+# Solcast / Forecast.Solar style forecasts are reduced to one columnar series
+# (period start, expected Wh in the period) – parsed once per forecast update,
+# aligned to the price slots once per plan build.
+PV_PERIOD_S = 1800.0        # period length if it cannot be derived (Solcast default)
+
+# value kinds an adapter reports: energy per period or average power
+PV_KIND_WH = "wh"
+PV_KIND_W = "w"
+PV_KIND_KW = "kw"
+
+
+@dataclass(frozen=True)
+class PvForecast:
+    """Ascending period starts and the expected PV energy (Wh) of each period."""
+
+    ts: array = field(default_factory=lambda: array("d"))
+    wh: array = field(default_factory=lambda: array("d"))
+    source: str = "none"
+    period_s: float | None = None
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def period_end(self, k: int) -> float:
+        length = self.period_s or PV_PERIOD_S
+        if k + 1 < len(self.ts):
+            return min(self.ts[k + 1], self.ts[k] + length)
+        return self.ts[k] + length
+
+    def align(self, ts: Sequence[float], slot_end: Callable[[int], float]) -> array:
+        """Expected Wh per slot of another series in O(n + m).
+
+        Power is taken as constant within a forecast period, so a period is
+        split over the slots it overlaps (30 min Solcast -> 15 min prices,
+        hourly Forecast.Solar -> 15 min prices, ...).
+        """
+        n = len(ts)
+        out = array("d", bytes(8 * n))
+        m = len(self.ts)
+        k = 0
+        for j in range(n):
+            start = ts[j]
+            end = slot_end(j)
+            while k < m and self.period_end(k) <= start:
+                k += 1
+            i = k
+            acc = 0.0
+            while i < m and self.ts[i] < end:
+                p_start = self.ts[i]
+                p_end = self.period_end(i)
+                overlap = min(p_end, end) - max(p_start, start)
+                if overlap > 0 and p_end > p_start:
+                    acc += self.wh[i] * overlap / (p_end - p_start)
+                i += 1
+            out[j] = acc
+        return out
+
+
+# --------------------------------------------------
+# adapters: attributes -> (points, value kind) or None if not this format
+# --------------------------------------------------
+Adapter = Callable[[Mapping[str, Any]], "tuple[list[tuple[float, float]], str] | None"]
+
+
+def _solcast(attrs: Mapping[str, Any]) -> tuple[list[tuple[float, float]], str] | None:
+    """Solcast: detailedForecast / detailedHourly = [{period_start, pv_estimate (kW)}]."""
+    for key in ("detailedForecast", "detailedHourly"):
+        items = attrs.get(key)
+        if not isinstance(items, list):
+            continue
+        points: list[tuple[float, float]] = []
+        for item in items:
+            if not isinstance(item, Mapping):
+                continue
+            t = _epoch(item.get("period_start"))
+            v = _num(item.get("pv_estimate"))
+            if t is not None and v is not None:
+                points.append((t, v))
+        return points, PV_KIND_KW
+    return None
+
+
+def _forecast_solar(attrs: Mapping[str, Any]) -> tuple[list[tuple[float, float]], str] | None:
+    """Forecast.Solar style: wh_period = {start: Wh} or watts = {start: W}."""
+    for key, kind in (("wh_period", PV_KIND_WH), ("wh_hours", PV_KIND_WH), ("watts", PV_KIND_W)):
+        items = attrs.get(key)
+        if not isinstance(items, Mapping):
+            continue
+        points: list[tuple[float, float]] = []
+        for when, value in items.items():
+            t = _epoch(when)
+            v = _num(value)
+            if t is not None and v is not None:
+                points.append((t, v))
+        return points, kind
+    return None
+
+
+PV_ADAPTERS: tuple[tuple[str, Adapter], ...] = (
+    ("solcast", _solcast),
+    ("forecast_solar", _forecast_solar),
+)
+
+
+def parse_pv_forecast(attrs_list: Sequence[Mapping[str, Any] | None]) -> PvForecast:
+    """Forecast entity attributes -> PvForecast (Wh per period).
+
+    Several entities (e.g. Solcast today + tomorrow) are merged; a later
+    entity wins for periods present in both.
+    """
+    merged: dict[float, float] = {}
+    source = "none"
+    for attrs in attrs_list:
+        if not attrs:
+            continue
+        for name, adapter in PV_ADAPTERS:
+            parsed = adapter(attrs)
+            if parsed is None:
+                continue
+            points, kind = parsed
+            factor = 1.0
+            if kind != PV_KIND_WH:
+                # average power over the period -> energy
+                period_s = resolution(sorted(t for t, _v in points)) or PV_PERIOD_S
+                factor = period_s / 3600.0 * (1000.0 if kind == PV_KIND_KW else 1.0)
+            merged.update((t, max(v, 0.0) * factor) for t, v in points)
+            source = name
+            break
+    if not merged:
+        return PvForecast()
+
+    ts = array("d", sorted(merged))
+    return PvForecast(
+        ts=ts,
+        wh=array("d", (merged[t] for t in ts)),
+        source=source,
+        period_s=resolution(ts) or PV_PERIOD_S,
+    )
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any
+
+# ==================================================
+# Rolling price distribution (V1.5)
+# ==================================================
+SKETCH_CELLS = 20           # P² markers at 0, 5, ..., 100 %
+PRICE_WEEKS_KEPT = 4        # rolling window (one sketch per week)
+PRICE_QUANTILE_MIN_SLOTS = 48  # fewer observed slots -> no adaptive threshold
+WEEK_S = 7 * 86400
+
+
+class P2Sketch:
+    """P² histogram (Jain & Chlamtac): SKETCH_CELLS equiprobable cells.
+
+    Constant memory (SKETCH_CELLS + 1 marker heights and positions) and a
+    constant amount of work per observation; no observation is stored once
+    the markers are initialised.
+    """
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.q: list[float] = []      # marker heights (the first observations until initialised)
+        self.pos: list[int] = []      # marker positions (0-based ranks)
+
+    def add(self, x: float) -> None:
+        x = float(x)
+        b = SKETCH_CELLS
+        self.n += 1
+        if not self.pos:
+            self.q.append(x)
+            if len(self.q) == b + 1:
+                self.q.sort()
+                self.pos = list(range(b + 1))
+            return
+
+        q, pos = self.q, self.pos
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[b]:
+            q[b] = x
+            k = b - 1
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, b + 1):
+            pos[i] += 1
+
+        for i in range(1, b):
+            d = i * (self.n - 1) / b - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = self._parabolic(i, s)
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (pos[i + s] - pos[i])
+                q[i] = qp
+                pos[i] += s
+
+    def _parabolic(self, i: int, s: int) -> float:
+        q, n = self.q, self.pos
+        return q[i] + s / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def cdf(self, x: float) -> float:
+        """Fraction of observations <= x (piecewise linear between markers)."""
+        if self.n == 0:
+            return 0.0
+        if not self.pos:
+            return sum(1 for v in self.q if v <= x) / self.n
+        q, pos = self.q, self.pos
+        if x < q[0]:
+            return 0.0
+        if x >= q[-1]:
+            return 1.0
+        k = 0
+        while x >= q[k + 1]:
+            k += 1
+        span = q[k + 1] - q[k]
+        rank = pos[k] + ((x - q[k]) / span * (pos[k + 1] - pos[k]) if span > 0 else 0.0)
+        return (rank + 1) / self.n
+
+    def as_list(self) -> list[Any]:
+        return [self.n, [round(v, 5) for v in self.q], list(self.pos)]
+
+    @classmethod
+    def from_list(cls, data: Any) -> P2Sketch:
+        sketch = cls()
+        n, q, pos = data
+        sketch.n = int(n)
+        sketch.q = [float(v) for v in q]
+        sketch.pos = [int(v) for v in pos]
+        if sketch.pos and (len(sketch.pos) != SKETCH_CELLS + 1 or len(sketch.q) != SKETCH_CELLS + 1):
+            raise ValueError("sketch size mismatch")
+        return sketch
+
+
+class PriceQuantiles:
+    """Distribution of the observed price slots over the last PRICE_WEEKS_KEPT weeks.
+
+    Every slot is fed once when it starts; a query pools the weekly sketches
+    (weighted by their slot counts) and inverts the combined CDF.
+    """
+
+    def __init__(self) -> None:
+        self.weeks: OrderedDict[int, P2Sketch] = OrderedDict()
+        self.last_slot_ts: float | None = None
+
+    @property
+    def slots(self) -> int:
+        return sum(s.n for s in self.weeks.values())
+
+    def add(self, slot_ts: float, price: float) -> None:
+        if self.last_slot_ts is not None and slot_ts <= self.last_slot_ts:
+            return
+        self.last_slot_ts = float(slot_ts)
+        week = int(slot_ts // WEEK_S)
+        sketch = self.weeks.get(week)
+        if sketch is None:
+            sketch = P2Sketch()
+            self.weeks[week] = sketch
+            while len(self.weeks) > PRICE_WEEKS_KEPT:
+                self.weeks.popitem(last=False)
+        sketch.add(price)
+
+    def feed(self, ts: list[float], price: list[float], now_ts: float) -> int:
+        """Add the slots of a price series that started since the last call. Returns the count."""
+        k = bisect_right(ts, self.last_slot_ts) if self.last_slot_ts is not None else 0
+        added = 0
+        while k < len(ts) and ts[k] <= now_ts:
+            self.add(ts[k], price[k])
+            k += 1
+            added += 1
+        return added
+
+    def quantile(self, p: float) -> float | None:
+        """Price below which a fraction `p` of the slots fell (None if too few slots)."""
+        total = self.slots
+        if total < PRICE_QUANTILE_MIN_SLOTS:
+            return None
+        p = min(max(float(p), 0.0), 1.0)
+        lo = min(s.q[0] if s.pos else min(s.q) for s in self.weeks.values() if s.n)
+        hi = max(s.q[-1] if s.pos else max(s.q) for s in self.weeks.values() if s.n)
+        for _ in range(40):
+            mid = (lo + hi) / 2.0
+            if sum(s.cdf(mid) * s.n for s in self.weeks.values()) / total < p:
+                lo = mid
+            else:
+                hi = mid
+        return hi
+
+    # --------------------------------------------------
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "last_slot_ts": self.last_slot_ts,
+            "weeks": [[w, *s.as_list()] for w, s in self.weeks.items()],
+        }
+
+    def restore(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        try:
+            for row in data.get("weeks") or []:
+                self.weeks[int(row[0])] = P2Sketch.from_list(row[1:])
+            while len(self.weeks) > PRICE_WEEKS_KEPT:
+                self.weeks.popitem(last=False)
+            last = data.get("last_slot_ts")
+            self.last_slot_ts = float(last) if last is not None else None
+        except (TypeError, ValueError):
+            self.weeks.clear()
+            self.last_slot_ts = None
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from statistics import median
+from typing import Any
+
+# ==================================================
+# Input sampling between cycles (V1.5)
+# ==================================================
+SAMPLE_LEN = 32             # samples kept per entity (a few cycles of a fast meter)
+TRIM_MIN_SAMPLES = 5        # below this the median is used
+TRIM_FRACTION = 0.2         # cut 20 % at both ends before averaging
+
+# an input unavailable / unknown for longer than this is stale (the last good
+# value is held until then). PV and SoC often write only on change, so an
+# unchanged value is not stale; grid meter, battery power and current price
+# report continuously and are also stale when not re-reported (last_reported).
+STALE_GRID_S = 120.0
+STALE_PV_S = 900.0
+STALE_SOC_S = 3600.0
+STALE_BATTERY_POWER_S = 120.0   # older -> treated as not measured (last command instead)
+STALE_PRICE_S = 7200.0          # current price not reported for longer -> ignored
+
+# inputs whose staleness stops the cycle (safe hold: ZA manager off, emergency latch only)
+HOLD_LIMITS: dict[str, float] = {
+    "soc": STALE_SOC_S,
+    "pv": STALE_PV_S,
+    "deficit": STALE_GRID_S,
+    "surplus": STALE_GRID_S,
+}
+
+# inputs that are dropped (value None) once stale, the cycle goes on without them
+DROP_LIMITS: dict[str, float] = {
+    "battery_power": STALE_BATTERY_POWER_S,
+    "price_now": STALE_PRICE_S,
+}
+
+
+class SampleBuffer:
+    """Ring buffer of (timestamp, value) state changes of one entity."""
+
+    def __init__(self) -> None:
+        self._samples: deque[tuple[float, float]] = deque(maxlen=SAMPLE_LEN)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def last_ts(self) -> float | None:
+        return self._samples[-1][0] if self._samples else None
+
+    def add(self, ts: float, value: float) -> None:
+        if self._samples and ts < self._samples[-1][0]:
+            return  # late duplicate of an older state
+        self._samples.append((float(ts), float(value)))
+
+    def window(self, since_ts: float | None) -> list[float]:
+        """Values since `since_ts` plus the one that was valid at `since_ts`."""
+        if since_ts is None:
+            return [self._samples[-1][1]] if self._samples else []
+        values: list[float] = []
+        carried: float | None = None
+        for t, v in self._samples:
+            if t > since_ts:
+                values.append(v)
+            else:
+                carried = v
+        if carried is not None:
+            values.insert(0, carried)
+        return values
+
+    def robust(self, since_ts: float | None) -> float | None:
+        """Median (few samples) or trimmed mean of the window."""
+        values = self.window(since_ts)
+        if not values:
+            return None
+        if len(values) < TRIM_MIN_SAMPLES:
+            return float(median(values))
+        values.sort()
+        k = int(len(values) * TRIM_FRACTION)
+        kept = values[k:len(values) - k]
+        return sum(kept) / len(kept)
+
+
+@dataclass(frozen=True)
+class Reading:
+    """One input value of the cycle and how long it has not been usable (0 = current)."""
+
+    value: float | None
+    age_s: float | None = None
+
+    def stale(self, limit_s: float) -> bool:
+        return self.age_s is not None and self.age_s > limit_s
+
+    def within(self, limit_s: float) -> Reading:
+        """This reading, or no value (same age) once it is stale."""
+        return Reading(None, self.age_s) if self.stale(limit_s) else self
+
+
+@dataclass(frozen=True)
+class InputSnapshot:
+    """All inputs of one cycle, read once at its start.
+
+    The rest of the cycle only works on this record, so every decision
+    in a cycle sees the same, timestamped view of the house.
+    """
+
+    ts: float                   # epoch s of the snapshot
+    soc: Reading
+    pv: Reading
+    deficit: Reading            # grid import (W, >= 0)
+    surplus: Reading            # grid export (W, >= 0)
+    price_now: Reading
+    battery_power: Reading      # measured device power (+charge / -discharge)
+    price_export: Any = None    # price export entity attributes (read only mapping)
+    price_unit: Any = None      # unit_of_measurement of the export entity
+    price_updated: Any = None   # last_updated of the export entity
+    pv_forecast: tuple[Any, ...] = ()          # attributes of each PV forecast entity
+    pv_forecast_updated: tuple[Any, ...] = ()  # their last_updated (change detection)
+
+    def readings(self) -> dict[str, Reading]:
+        return {
+            "soc": self.soc,
+            "pv": self.pv,
+            "deficit": self.deficit,
+            "surplus": self.surplus,
+            "price_now": self.price_now,
+            "battery_power": self.battery_power,
+        }
+
+    def ages(self) -> dict[str, float | None]:
+        return {
+            name: round(r.age_s, 1) if r.age_s is not None else None
+            for name, r in self.readings().items()
+        }
+
+    def stale(self, limits: dict[str, float]) -> list[str]:
+        """Names of all inputs older than their limit (one pass over the record)."""
+        readings = self.readings()
+        return [name for name, limit in limits.items() if readings[name].stale(limit)]
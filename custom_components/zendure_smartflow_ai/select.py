@@ -17,6 +17,10 @@ from .const import (
     MANUAL_ACTIONS,
     AI_MODE_AUTOMATIC,
     MANUAL_STANDBY,
+    CONTROL_MODES,
+    CONTROL_MODE_TICK,
+    GRID_CAP_MODES,
+    GRID_CAP_OFF,
 )
 
 
@@ -52,6 +56,26 @@ SELECTS: tuple[ZendureSelectEntityDescription, ...] = (
         default_option=MANUAL_STANDBY,
         icon="mdi:gesture-tap-button",
     ),
+
+    # 3. Regelung (Zyklus oder schneller PI-Regler)
+    ZendureSelectEntityDescription(
+        key="control_mode",
+        translation_key="control_mode",
+        runtime_key="control_mode",
+        options_list=CONTROL_MODES,
+        default_option=CONTROL_MODE_TICK,
+        icon="mdi:sine-wave",
+    ),
+
+    # 4. Netzgrenze (Einspeisung / Bezug)
+    ZendureSelectEntityDescription(
+        key="grid_cap_mode",
+        translation_key="grid_cap_mode",
+        runtime_key="grid_cap_mode",
+        options_list=GRID_CAP_MODES,
+        default_option=GRID_CAP_OFF,
+        icon="mdi:transmission-tower-off",
+    ),
 )
 
 
@@ -4,11 +4,14 @@ import logging
 from dataclasses import dataclass
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorEntity,
     SensorEntityDescription,
     SensorDeviceClass,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import MATCH_ALL, EntityCategory
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -37,8 +40,10 @@ PLANNING_STATUS_ENUMS = [
     "planning_no_peak_detected",
     "planning_peak_detected_insufficient_window",
     "planning_waiting_for_cheap_window",
+    "planning_pv_expected",
     "planning_charge_now",
     "planning_last_chance",
+    "planning_degraded",
 ]
 
 @dataclass(frozen=True, kw_only=True)
@@ -207,6 +212,151 @@ SENSORS: tuple[ZendureSensorEntityDescription, ...] = (
         runtime_key="profit_eur",
         icon="mdi:cash",
         native_unit_of_measurement="€",
+        state_class=SensorStateClass.TOTAL,
+    ),
+
+    # --- Lifetime totals (long-term statistics, restored on restart) ---
+    ZendureSensorEntityDescription(
+        key="charged_energy_total",
+        translation_key="charged_energy_total",
+        runtime_key="charged_kwh",
+        icon="mdi:battery-arrow-up",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement="kWh",
+        suggested_display_precision=2,
+    ),
+    ZendureSensorEntityDescription(
+        key="discharged_energy_total",
+        translation_key="discharged_energy_total",
+        runtime_key="discharged_kwh",
+        icon="mdi:battery-arrow-down",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement="kWh",
+        suggested_display_precision=2,
+    ),
+
+    ZendureSensorEntityDescription(
+        key="equivalent_full_cycles",
+        translation_key="equivalent_full_cycles",
+        runtime_key="equivalent_full_cycles",
+        icon="mdi:battery-sync",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=2,
+    ),
+    ZendureSensorEntityDescription(
+        key="cycle_depth_avg",
+        translation_key="cycle_depth_avg",
+        runtime_key="cycle_depth_avg",
+        icon="mdi:chart-histogram",
+        native_unit_of_measurement="%",
+        suggested_display_precision=0,
+    ),
+
+    ZendureSensorEntityDescription(
+        key="soc_estimate",
+        translation_key="soc_estimate",
+        runtime_key="soc_estimate",
+        icon="mdi:battery-sync-outline",
+        device_class=SensorDeviceClass.BATTERY,
+        native_unit_of_measurement="%",
+        suggested_display_precision=1,
+    ),
+
+    # --- Today (local day, reset at midnight) ---
+    ZendureSensorEntityDescription(
+        key="profit_today",
+        translation_key="profit_today",
+        runtime_key="profit_today",
+        icon="mdi:cash-clock",
+        native_unit_of_measurement="€",
+        suggested_display_precision=2,
+    ),
+    ZendureSensorEntityDescription(
+        key="charged_today_kwh",
+        translation_key="charged_today_kwh",
+        runtime_key="charged_today_kwh",
+        icon="mdi:battery-arrow-up-outline",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement="kWh",
+        suggested_display_precision=2,
+    ),
+    ZendureSensorEntityDescription(
+        key="discharged_today_kwh",
+        translation_key="discharged_today_kwh",
+        runtime_key="discharged_today_kwh",
+        icon="mdi:battery-arrow-down-outline",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement="kWh",
+        suggested_display_precision=2,
+    ),
+    ZendureSensorEntityDescription(
+        key="self_consumption_today",
+        translation_key="self_consumption_today",
+        runtime_key="self_consumption_today",
+        icon="mdi:solar-power-variant",
+        native_unit_of_measurement="%",
+        suggested_display_precision=0,
+    ),
+    ZendureSensorEntityDescription(
+        key="autarky_today",
+        translation_key="autarky_today",
+        runtime_key="autarky_today",
+        icon="mdi:home-battery",
+        native_unit_of_measurement="%",
+        suggested_display_precision=0,
+    ),
+
+    # --- Actuator feedback (diagnostic) ---
+    ZendureSensorEntityDescription(
+        key="actuator_latency_p50",
+        translation_key="actuator_latency_p50",
+        runtime_key="actuator_latency_p50",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement="s",
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    ZendureSensorEntityDescription(
+        key="actuator_latency_p95",
+        translation_key="actuator_latency_p95",
+        runtime_key="actuator_latency_p95",
+        icon="mdi:timer-alert-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement="s",
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    ZendureSensorEntityDescription(
+        key="actuator_error_w",
+        translation_key="actuator_error_w",
+        runtime_key="actuator_error_w",
+        icon="mdi:target-variant",
+        native_unit_of_measurement="W",
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    ZendureSensorEntityDescription(
+        key="actuator_resends",
+        translation_key="actuator_resends",
+        runtime_key="actuator_resends",
+        icon="mdi:send-clock",
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+
+    # --- Grid cap ---
+    ZendureSensorEntityDescription(
+        key="grid_cap_violations",
+        translation_key="grid_cap_violations",
+        runtime_key="grid_cap_violations",
+        icon="mdi:transmission-tower-off",
+    ),
+    ZendureSensorEntityDescription(
+        key="grid_cap_violation_s",
+        translation_key="grid_cap_violation_s",
+        runtime_key="grid_cap_violation_s",
+        icon="mdi:timer-alert",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement="s",
     ),
 )
 
@@ -224,12 +374,17 @@ async def async_setup_entry(
 
     entities = []
     for d in SENSORS:
-        entities.append(ZendureSmartFlowSensor(entry, coordinator, d))
+        if d.state_class in (SensorStateClass.TOTAL, SensorStateClass.TOTAL_INCREASING):
+            entities.append(ZendureSmartFlowTotalSensor(entry, coordinator, d))
+        else:
+            entities.append(ZendureSmartFlowSensor(entry, coordinator, d))
 
     add_entities(entities)
 
 class ZendureSmartFlowSensor(SensorEntity):
     _attr_has_entity_name = True
+    # the details dict changes every cycle – keep it out of the recorder
+    _unrecorded_attributes = frozenset({MATCH_ALL})
 
     def __init__(
         self,
@@ -269,6 +424,8 @@ class ZendureSmartFlowSensor(SensorEntity):
             "price_now",
             "avg_charge_price",
             "profit_eur",
+            "charged_kwh",
+            "discharged_kwh",
             "planning_status",
             "planning_active",
             "planning_target_soc",
@@ -277,6 +434,20 @@ class ZendureSmartFlowSensor(SensorEntity):
             "next_action_time",
             "next_planned_action",
             "next_planned_action_time",
+            "soc_estimate",
+            "equivalent_full_cycles",
+            "cycle_depth_avg",
+            "profit_today",
+            "charged_today_kwh",
+            "discharged_today_kwh",
+            "self_consumption_today",
+            "autarky_today",
+            "actuator_latency_p50",
+            "actuator_latency_p95",
+            "actuator_error_w",
+            "actuator_resends",
+            "grid_cap_violations",
+            "grid_cap_violation_s",
         ):
             return details.get(key)
 
@@ -287,6 +458,12 @@ class ZendureSmartFlowSensor(SensorEntity):
         data = self.coordinator.data or {}
         details = data.get("details") or {}
 
+        if self.entity_description.key in ("actuator_latency_p95", "actuator_error_w"):
+            return self.coordinator.actuator.histograms()
+
+        if self.entity_description.key == "cycle_depth_avg":
+            return self.coordinator.rainflow.histogram_dict()
+
         if self.entity_description.key in (
             "status",
             "ai_status",
@@ -307,4 +484,40 @@ class ZendureSmartFlowSensor(SensorEntity):
     async def async_added_to_hass(self) -> None:
         self.async_on_remove(
             self.coordinator.async_add_listener(self.async_write_ha_state)
-        )
\ No newline at end of file
+        )
+
+
+class ZendureSmartFlowTotalSensor(ZendureSmartFlowSensor, RestoreSensor):
+    """Lifetime total: never drops back (the recorder would count a meter reset).
+
+    A cycle without totals (invalid or stale sensors) keeps the last known
+    value; the restored value is only used until the first good cycle.
+    """
+
+    _restored_value = None
+    _last_value = None
+
+    @property
+    def available(self) -> bool:
+        return (
+            self.coordinator.last_update_success
+            or self._last_value is not None
+            or self._restored_value is not None
+        )
+
+    @property
+    def native_value(self):
+        value = super().native_value if self.coordinator.data else None
+        if value is not None:
+            self._last_value = value
+            return value
+        return self._last_value if self._last_value is not None else self._restored_value
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        last = await self.async_get_last_sensor_data()
+        if last is not None and last.native_value is not None:
+            try:
+                self._restored_value = float(last.native_value)
+            except (TypeError, ValueError):
+                self._restored_value = None
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Any
+
+# ==================================================
+# Battery cycling – streaming rainflow count (V1.5)
+# ==================================================
+SOC_TURN_HYST = 0.5         # % – smaller reversals are noise, not turning points
+RAINFLOW_STACK_MAX = 64     # residue kept at most (oldest counted as half cycles)
+DOD_BIN_PCT = 10            # histogram bin width (depth of discharge, %)
+DOD_BINS = 100 // DOD_BIN_PCT
+
+
+class RainflowCounter:
+    """Incremental rainflow counting (ASTM E1049, three-point) on SoC.
+
+    SoC samples are reduced to turning points first; every closed cycle adds
+    count * depth / 100 equivalent full cycles and lands in the depth
+    histogram. The residue stack holds decreasing ranges only, so it stays
+    small; RAINFLOW_STACK_MAX is a hard bound on top.
+    """
+
+    def __init__(self) -> None:
+        self.stack: list[float] = []
+        self.efc = 0.0
+        self.histogram: list[float] = [0.0] * DOD_BINS   # cycles per DOD_BIN_PCT bin
+        self._ext: float | None = None   # running extreme since the last turning point
+        self._dir = 0                    # +1 rising, -1 falling, 0 unknown
+
+    def add(self, soc: float | None) -> None:
+        if soc is None:
+            return
+        x = float(soc)
+        if self._ext is None:
+            self._ext = x
+            return
+        d = x - self._ext
+        if self._dir == 0:
+            if abs(d) >= SOC_TURN_HYST:
+                self._push(self._ext)
+                self._dir = 1 if d > 0 else -1
+                self._ext = x
+        elif d * self._dir > 0:
+            self._ext = x
+        elif abs(d) >= SOC_TURN_HYST:
+            self._push(self._ext)
+            self._dir = -self._dir
+            self._ext = x
+
+    def _push(self, point: float) -> None:
+        s = self.stack
+        s.append(point)
+        while len(s) >= 3:
+            x = abs(s[-1] - s[-2])
+            y = abs(s[-2] - s[-3])
+            if x < y:
+                break
+            if len(s) == 3:
+                self._count(y, 0.5)
+                del s[0]
+            else:
+                self._count(y, 1.0)
+                del s[-3:-1]
+        if len(s) > RAINFLOW_STACK_MAX:
+            self._count(abs(s[1] - s[0]), 0.5)
+            del s[0]
+
+    def _count(self, depth: float, count: float) -> None:
+        self.efc += count * depth / 100.0
+        self.histogram[min(int(depth // DOD_BIN_PCT), DOD_BINS - 1)] += count
+
+    # --------------------------------------------------
+    @property
+    def cycles(self) -> float:
+        return sum(self.histogram)
+
+    def mean_depth(self) -> float | None:
+        """Average depth of the counted cycles in % (None before the first one)."""
+        cycles = self.cycles
+        return self.efc * 100.0 / cycles if cycles > 0 else None
+
+    def histogram_dict(self) -> dict[str, float]:
+        return {
+            f"dod_{k * DOD_BIN_PCT}_{(k + 1) * DOD_BIN_PCT}": round(v, 1)
+            for k, v in enumerate(self.histogram)
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stack": [round(v, 2) for v in self.stack],
+            "efc": round(self.efc, 4),
+            "histogram": [round(v, 2) for v in self.histogram],
+            "ext": self._ext,
+            "dir": self._dir,
+        }
+
+    def restore(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        try:
+            self.stack = [float(v) for v in data.get("stack") or []][-RAINFLOW_STACK_MAX:]
+            self.efc = max(float(data.get("efc", 0.0)), 0.0)
+            hist = [float(v) for v in data.get("histogram") or []]
+            if len(hist) == DOD_BINS:
+                self.histogram = hist
+            ext = data.get("ext")
+            self._ext = float(ext) if ext is not None else None
+            self._dir = max(min(int(data.get("dir", 0)), 1), -1)
+        except (TypeError, ValueError):
+            return
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+PLAN_COLUMNS = ("ts", "price", "action", "watts", "soc", "pv_wh")
+
+
+@callback
+def async_register_websocket_api(hass: HomeAssistant) -> None:
+    """Register plan/trace commands (data is only built when requested)."""
+    websocket_api.async_register_command(hass, ws_plan)
+    websocket_api.async_register_command(hass, ws_subscribe_plan)
+    websocket_api.async_register_command(hass, ws_trace)
+
+
+def _get_coordinator(hass: HomeAssistant, connection, msg: dict[str, Any]):
+    coordinators = hass.data.get(DOMAIN, {})
+    entry_id = msg.get("entry_id")
+    if entry_id:
+        coordinator = coordinators.get(entry_id)
+    else:
+        coordinator = next(iter(coordinators.values()), None)
+
+    if coordinator is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not found")
+    return coordinator
+
+
+def _plan_delta(prev: dict[str, Any] | None, cur: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Only the part of the plan that changed since `prev` (aligned by slot start).
+
+    The client keeps its arrays up to `from_ts` and replaces everything from
+    there on with the columns sent here.
+    """
+    if cur is None:
+        return None
+    if prev is None:
+        return {**cur, "from_ts": cur["ts"][0] if cur["ts"] else None, "full": True}
+
+    prev_rows = {
+        t: tuple(prev[c][k] for c in PLAN_COLUMNS[1:])
+        for k, t in enumerate(prev["ts"])
+    }
+    start = len(cur["ts"])
+    for k, t in enumerate(cur["ts"]):
+        if prev_rows.get(t) != tuple(cur[c][k] for c in PLAN_COLUMNS[1:]):
+            start = k
+            break
+
+    delta = {key: value for key, value in cur.items() if key not in PLAN_COLUMNS}
+    delta.update({c: cur[c][start:] for c in PLAN_COLUMNS})
+    delta["from_ts"] = cur["ts"][start] if start < len(cur["ts"]) else None
+    delta["full"] = False
+    return delta
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/plan",
+        vol.Optional("entry_id"): str,
+    }
+)
+@callback
+def ws_plan(hass: HomeAssistant, connection, msg: dict[str, Any]) -> None:
+    """Return the cached full-horizon plan as columnar arrays."""
+    coordinator = _get_coordinator(hass, connection, msg)
+    if coordinator is None:
+        return
+    connection.send_result(msg["id"], coordinator.get_plan())
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/plan/subscribe",
+        vol.Optional("entry_id"): str,
+    }
+)
+@callback
+def ws_subscribe_plan(hass: HomeAssistant, connection, msg: dict[str, Any]) -> None:
+    """Push the plan once, then only deltas whenever a new plan revision exists."""
+    coordinator = _get_coordinator(hass, connection, msg)
+    if coordinator is None:
+        return
+
+    last_sent: dict[str, Any] = {"plan": None}
+
+    @callback
+    def _forward() -> None:
+        cur = coordinator.get_plan()
+        delta = _plan_delta(last_sent["plan"], cur)
+        last_sent["plan"] = cur
+        connection.send_message(websocket_api.event_message(msg["id"], delta))
+
+    connection.subscriptions[msg["id"]] = coordinator.async_add_plan_listener(_forward)
+    connection.send_result(msg["id"])
+    _forward()
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/trace",
+        vol.Optional("entry_id"): str,
+        vol.Optional("since"): vol.Coerce(float),
+        vol.Optional("limit"): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    }
+)
+@callback
+def ws_trace(hass: HomeAssistant, connection, msg: dict[str, Any]) -> None:
+    """Return recent decisions as columnar arrays."""
+    coordinator = _get_coordinator(hass, connection, msg)
+    if coordinator is None:
+        return
+    connection.send_result(
+        msg["id"],
+        coordinator.get_trace(since=msg.get("since"), limit=msg.get("limit")),
+    )